@@ -0,0 +1,108 @@
+"""
+Compares the NumPy batch evaluation with evaluating the boards one by one, and checks that both agree
+
+Run with `python -m benchmarks.batch`
+"""
+
+import random
+import time
+
+from core.batch import WIN_SCORE, O, X, scores, to_array, valid_moves, winners
+from core.engine import VARIANTS, Board, Variant
+
+
+def random_boards(variant: Variant, count: int, seed: int) -> list[Board]:
+    """Random positions of all stages of the game, finished ones included"""
+
+    rng = random.Random(seed)
+    boards = []
+    for _ in range(count):
+        board = Board.from_variant(variant)
+        for i in range(rng.randrange(variant.rows * variant.columns)):
+            board.play("XO"[i % 2], rng.choice(board.valid_moves()))
+            if board.get_winner_symbol() or board.is_full():
+                break
+        boards.append(board)
+    return boards
+
+
+def reference_score(board: Board) -> int:
+    """The heuristic of `core.batch.scores`, for a single board in plain python"""
+
+    cells = [
+        [board.cell(row, column) for column in range(board.columns)]
+        for row in range(board.rows)
+    ]
+    weights = [0] + [4**pieces for pieces in range(1, board.to_win)] + [WIN_SCORE]
+
+    total = 0
+    for row in range(board.rows):
+        for column in range(board.columns):
+            for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                end_row = row + dr * (board.to_win - 1)
+                end_column = column + dc * (board.to_win - 1)
+                if not (0 <= end_row < board.rows and 0 <= end_column < board.columns):
+                    continue
+
+                window = [
+                    cells[row + dr * i][column + dc * i] for i in range(board.to_win)
+                ]
+                if "O" not in window:
+                    total += weights[window.count("X")]
+                if "X" not in window:
+                    total -= weights[window.count("O")]
+    return total
+
+
+def bench_variant(key: str, variant: Variant, count: int = 20_000):
+    boards = random_boards(variant, count, seed=0)
+
+    start = time.perf_counter()
+    cells = to_array(boards)
+    converted = time.perf_counter() - start
+
+    start = time.perf_counter()
+    expected = [(board.get_winner_symbol(), board.valid_moves()) for board in boards]
+    one_by_one = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch_winners, batch_valid_moves = winners(cells, variant.to_win), valid_moves(
+        cells
+    )
+    batched = time.perf_counter() - start
+
+    # both ways have to agree
+    symbols = {X: "X", O: "O", 0: None}
+    for i, (winner, moves) in enumerate(expected):
+        assert (
+            symbols[int(batch_winners[i])] == winner
+        ), f"{key} board {i}: wrong winner"
+        assert (
+            batch_valid_moves[i].nonzero()[0].tolist() == moves
+        ), f"{key} board {i}: wrong valid moves"
+
+    print(
+        f"{key:>6} | {count} boards | winners + valid moves | one by one {one_by_one * 1000:8.1f}ms "
+        f"| batched {batched * 1000:8.1f}ms (+ {converted * 1000:.1f}ms to convert)"
+    )
+
+    # the plain python heuristic is slow, so only a part of the boards is compared
+    sample = count // 20
+    start = time.perf_counter()
+    expected_scores = [reference_score(board) for board in boards[:sample]]
+    one_by_one = (time.perf_counter() - start) * count / sample
+
+    start = time.perf_counter()
+    batch_scores = scores(cells, variant.to_win)
+    batched = time.perf_counter() - start
+
+    assert batch_scores[:sample].tolist() == expected_scores, f"{key}: wrong scores"
+    print(
+        f"{key:>6} | {count} boards | scores                | one by one {one_by_one * 1000:8.1f}ms "
+        f"| batched {batched * 1000:8.1f}ms"
+    )
+
+
+if __name__ == "__main__":
+    for key, variant in VARIANTS.items():
+        bench_variant(key, variant)
@@ -0,0 +1,84 @@
+"""
+Benchmarks the engine for every board variant
+
+Run with `python -m benchmarks.engine`
+"""
+
+import random
+import time
+from typing import Callable
+
+from core.engine import VARIANTS, Board, Variant, canonical_key, position_key, search
+
+
+def random_board(variant: Variant, moves: int, seed: int) -> Board:
+    """Plays random moves until `moves` pieces are on the board, without anyone winning"""
+
+    rng = random.Random(seed)
+    while True:
+        board = Board.from_variant(variant)
+        for i in range(moves):
+            board.play("XO"[i % 2], rng.choice(board.valid_moves()))
+            if board.get_winner_symbol():
+                break
+        else:
+            return board
+
+
+def timeit(func: Callable, repeat: int) -> float:
+    """Returns the average runtime of `func` in microseconds"""
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1_000_000
+
+
+def bench_variant(key: str, variant: Variant, depths: tuple[int, ...] = (1, 3, 5, 7)):
+    boards = [random_board(variant, moves=6, seed=seed) for seed in range(10)]
+
+    win_check = timeit(
+        lambda: [board.get_winner_symbol() for board in boards], repeat=1000
+    ) / len(boards)
+    print(f"{key:>6} | {'winner check':<22} | {win_check:12.2f} µs")
+
+    for depth in depths:
+        runtime = timeit(
+            lambda: [search(board, "O", depth) for board in boards], repeat=1
+        ) / len(boards)
+        print(f"{key:>6} | {f'search (depth {depth})':<22} | {runtime:12.2f} µs")
+
+
+def bench_symmetry(key: str, variant: Variant, plies: int = 4, depth: int = 5):
+    """Compares the number of distinct positions with and without merging mirror images"""
+
+    positions = set()
+    canonical_positions = set()
+    pending = [Board.from_variant(variant)]
+    while pending:
+        board = pending.pop()
+        current = board.pieces["XO"[len(board.moves) % 2]]
+        positions.add(position_key(current, board.mask))
+        canonical_positions.add(canonical_key(current, board.mask, board.geometry)[0])
+        if len(board.moves) < plies:
+            for position in board.valid_moves():
+                child = board.copy()
+                child.play("XO"[len(board.moves) % 2], position)
+                pending.append(child)
+    print(
+        f"{key:>6} | {f'positions ({plies} plies)':<22} | {len(positions):9} raw | {len(canonical_positions):9} canonical"
+    )
+
+    table = {}
+    runtime = timeit(
+        lambda: search(Board.from_variant(variant), "O", depth, table=table), repeat=1
+    )
+    print(
+        f"{key:>6} | {f'empty board (depth {depth})':<22} | {runtime:12.2f} µs | {len(table):9} table entries"
+    )
+
+
+if __name__ == "__main__":
+    for key, variant in VARIANTS.items():
+        bench_variant(key, variant)
+        bench_symmetry(key, variant)
@@ -0,0 +1,72 @@
+"""
+Plays the monte carlo search with different time budgets against the minimax search
+
+Run with `python -m benchmarks.mcts`
+"""
+
+import random
+
+from core.engine import VARIANTS, Board, Variant, search
+from core.mcts import MonteCarloTreeSearch
+
+
+def play_game(
+    variant: Variant, seconds: float, depth: int, mcts_starts: bool, seed: int
+) -> tuple[float, int, int]:
+    """Returns the score of the monte carlo search (1 win, 0.5 draw, 0 loss), its playouts and its moves"""
+
+    rng = random.Random(seed)
+    board = Board.from_variant(variant)
+    symbol = "O" if mcts_starts else "X"
+    playouts = moves = 0
+
+    while not board.is_full():
+        if symbol == "O":
+            tree = MonteCarloTreeSearch(
+                board=board, symbol="O", seed=rng.randrange(1 << 32)
+            )
+            position = tree.run(seconds=seconds)
+            playouts += tree.playouts
+            moves += 1
+        else:
+            # like the easier difficulties, otherwise every game would be the same
+            position, _ = search(board, "X", depth)
+            if position is None or rng.random() < 0.1:
+                position = rng.choice(board.valid_moves())
+
+        board.play(symbol, position)
+        if board.has_won(symbol):
+            return float(symbol == "O"), playouts, moves
+        symbol = "X" if symbol == "O" else "O"
+    return 0.5, playouts, moves
+
+
+def bench_budgets(
+    key: str,
+    variant: Variant,
+    budgets: tuple[float, ...],
+    depth: int = 3,
+    games: int = 4,
+):
+    for seconds in budgets:
+        score = playouts = moves = 0
+        for game in range(games):
+            result, game_playouts, game_moves = play_game(
+                variant,
+                seconds=seconds,
+                depth=depth,
+                mcts_starts=game % 2 == 0,
+                seed=game,
+            )
+            score += result
+            playouts += game_playouts
+            moves += game_moves
+        print(
+            f"{key:>6} | {seconds:5.2f}s per move | {score:4.1f} / {games} vs depth {depth} "
+            f"| {playouts / max(moves, 1):9.0f} playouts per move"
+        )
+
+
+if __name__ == "__main__":
+    for key, variant in VARIANTS.items():
+        bench_budgets(key, variant, budgets=(0.05, 0.1, 0.25))
@@ -0,0 +1,179 @@
+"""
+Measures how much memory a live game keeps, with the original layout and with the current one
+
+Both layouts are filled with real naff objects, built from the payloads Discord sends, so no connection is needed.
+Run with `python -m benchmarks.memory`
+"""
+
+import asyncio
+import copy
+import gc
+import tracemalloc
+from typing import Callable, Literal, Optional
+
+import attrs
+from naff import Button, ButtonStyles, Client, InteractionContext, Member, Message
+
+from core.connect_4 import Connect4
+from core.edits import MessageRef
+from core.payloads import BUTTONS
+
+
+@attrs.define(init=False)
+class LegacyGame:
+    """The fields the original `Connect4` kept for every game"""
+
+    ctx: InteractionContext = attrs.field()
+    message: Message = attrs.field()
+    _field: list[list[Literal["_", "O", "X"]]] = attrs.field()
+    _components: list[Button] = attrs.field()
+    _player_one: Member = attrs.field()
+    _player_two: Optional[Member] = attrs.field()
+
+    def __init__(self, ctx: InteractionContext, message: Message, moves: list[int]):
+        field = [["_"] * 7 for _ in range(6)]
+        for i, column in enumerate(moves):
+            row = max(row for row in range(6) if field[row][column] == "_")
+            field[row][column] = "XO"[i % 2]
+
+        components = [
+            Button(
+                custom_id=f"{ctx.author.id}|{custom_id}",
+                style=ButtonStyles.BLUE,
+                label=label,
+            )
+            for custom_id, label in BUTTONS
+        ]
+        self.__attrs_init__(ctx, message, field, components, ctx.author, None)
+
+
+def interaction_payload(i: int) -> dict:
+    user = {
+        "id": str(100_000_000_000_000_000 + i),
+        "username": f"player{i}",
+        "discriminator": "0001",
+        "avatar": "a" * 32,
+    }
+    return {
+        "id": str(200_000_000_000_000_000 + i),
+        "application_id": "300000000000000000",
+        "type": 2,
+        "token": "t" * 180,
+        "version": 1,
+        "guild_id": "400000000000000000",
+        "channel_id": "500000000000000000",
+        "member": {
+            "user": user,
+            "nick": f"Player {i}",
+            "roles": [],
+            "joined_at": "2022-01-01T00:00:00+00:00",
+            "deaf": False,
+            "mute": False,
+            "avatar": None,
+            "permissions": "0",
+        },
+        "locale": "en-US",
+        "guild_locale": "en-US",
+        "data": {
+            "id": "600000000000000000",
+            "name": "connect4",
+            "type": 1,
+            "options": [{"type": 1, "name": "computer"}],
+        },
+    }
+
+
+def message_payload(i: int, embed: dict, components: list[dict]) -> dict:
+    return {
+        "id": str(700_000_000_000_000_000 + i),
+        "channel_id": "500000000000000000",
+        "guild_id": "400000000000000000",
+        "author": {
+            "id": "800000000000000000",
+            "username": "Connect 4",
+            "discriminator": "0000",
+            "avatar": None,
+        },
+        "content": "",
+        "timestamp": "2022-01-01T00:00:00+00:00",
+        "edited_timestamp": None,
+        "tts": False,
+        "mention_everyone": False,
+        "mentions": [],
+        "mention_roles": [],
+        "attachments": [],
+        # naff pops keys out of the payload while parsing it
+        "embeds": [copy.deepcopy(embed)],
+        "components": copy.deepcopy(components),
+        "pinned": False,
+        "type": 0,
+    }
+
+
+def clear_cache(client: Client):
+    """Whatever naff cached while parsing stays alive either way, only what the games hold on to counts"""
+
+    for field in attrs.fields(type(client.cache)):
+        value = getattr(client.cache, field.name)
+        if hasattr(value, "clear"):
+            value.clear()
+
+
+def measure(client: Client, count: int, build: Callable[[int], object]) -> float:
+    """Bytes that stay allocated per game while `count` games are alive"""
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+
+    games = [build(i) for i in range(count)]
+    clear_cache(client)
+    gc.collect()
+
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del games
+    return (after - before) / count
+
+
+async def main(count: int = 2_000, moves: tuple[int, ...] = (3, 3, 2, 4, 4, 2, 1)):
+    client = Client()
+
+    def new_game(i: int) -> Connect4:
+        game = Connect4(
+            ctx=InteractionContext.from_dict(interaction_payload(i), client),
+            pvp=True,
+            pvp_difficulty=2,
+        )
+        for j, column in enumerate(moves):
+            game._board.play("XO"[j % 2], column)
+        return game
+
+    # the message as it was sent, rendering it for every game would only slow this down
+    sample = new_game(0)
+    embed, components = sample.get_embed(), sample.get_components()
+
+    def current_game(i: int) -> Connect4:
+        game = new_game(i)
+        game.message = MessageRef.from_message(
+            Message.from_dict(message_payload(i, embed, components), client)
+        )
+        return game
+
+    def legacy_game(i: int) -> LegacyGame:
+        return LegacyGame(
+            ctx=InteractionContext.from_dict(interaction_payload(i), client),
+            message=Message.from_dict(message_payload(i, embed, components), client),
+            moves=list(moves),
+        )
+
+    legacy = measure(client, count, legacy_game)
+    current = measure(client, count, current_game)
+    print(
+        f"{count} live games | before {legacy:8.0f} bytes per game | now {current:8.0f} bytes per game "
+        f"| {current / legacy:6.1%}"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
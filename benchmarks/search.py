@@ -0,0 +1,150 @@
+"""
+Checks that the search picks the same moves as the original minimax and compares the number of visited positions
+
+The difference comes from the transposition table, the mirror symmetry and the center first move ordering.
+The opening book and the position caches, which is what the bot actually uses, have to pick the same moves too, also
+for the mirror images of the positions they stored
+
+Run with `python -m benchmarks.search`
+"""
+
+import math
+import os
+from typing import Literal, Optional
+
+from benchmarks.engine import random_board
+from core.engine import (
+    VARIANTS,
+    Board,
+    SearchStats,
+    Variant,
+    has_won,
+    search,
+    search_both_ends,
+)
+from core.opening_book import OpeningBook
+from core.position_cache import PositionCache, SharedPositionCache
+
+
+def reference_search(
+    board: Board, symbol: Literal["O", "X"], depth: int, stats: SearchStats
+) -> tuple[Optional[int], int]:
+    """The original minimax: full alpha-beta window, float bounds, left to right, no table and no symmetry"""
+
+    other = "X" if symbol == "O" else "O"
+    geometry = board.geometry
+
+    def minimax(
+        pieces: dict[str, int],
+        mask: int,
+        is_maximizing: bool,
+        depth: int,
+        alpha: float,
+        beta: float,
+    ):
+        stats.nodes += 1
+        if has_won(pieces[symbol], geometry):
+            return None, 1
+        if has_won(pieces[other], geometry):
+            return None, -1
+        if depth == 0 or mask == geometry.board_mask:
+            return None, 0
+
+        best_move, best_score = None, -math.inf if is_maximizing else math.inf
+        to_move = symbol if is_maximizing else other
+        for position in range(geometry.columns):
+            if mask & geometry.top_masks[position]:
+                continue
+            new_mask = mask | (mask + geometry.bottom_masks[position])
+            child = dict(pieces)
+            child[to_move] |= new_mask ^ mask
+            _, score = minimax(
+                child, new_mask, not is_maximizing, depth - 1, alpha, beta
+            )
+
+            if is_maximizing:
+                if score > best_score:
+                    best_move, best_score = position, score
+                if best_score >= beta:
+                    break
+                alpha = max(alpha, best_score)
+            else:
+                if score < best_score:
+                    best_move, best_score = position, score
+                if best_score <= alpha:
+                    break
+                beta = min(beta, best_score)
+        return best_move, best_score
+
+    return minimax(dict(board.pieces), board.mask, True, depth, -math.inf, math.inf)
+
+
+def compare(key: str, variant: Variant, depth: int, positions: int = 20):
+    reference_stats = SearchStats()
+    stats = SearchStats()
+    for seed in range(positions):
+        board = random_board(variant, moves=6 + seed % 10, seed=seed)
+        expected = reference_search(board, "O", depth, reference_stats)
+        result = search(board, "O", depth, stats=stats)
+        assert (
+            result == expected
+        ), f"{key} depth {depth} seed {seed}: {result} != {expected}"
+
+    print(
+        f"{key:>6} | depth {depth} | {reference_stats.nodes / positions:10.0f} nodes before "
+        f"| {stats.nodes / positions:10.0f} nodes now | {stats.nodes / reference_stats.nodes:6.1%}"
+    )
+
+
+def mirrored_board(board: Board) -> Board:
+    mirrored = Board(rows=board.rows, columns=board.columns, to_win=board.to_win)
+    for i, position in enumerate(board.moves):
+        mirrored.play("XO"[i % 2], board.columns - 1 - position)
+    return mirrored
+
+
+def compare_cached(key: str, variant: Variant, depth: int, positions: int = 20):
+    """Stores the result of every position, then looks up its mirror image"""
+
+    stats = SearchStats()
+    both_stats = SearchStats()
+    shared = SharedPositionCache(
+        name=f"connect4-benchmark-{os.getpid()}", slots=1 << 12
+    )
+    try:
+        for seed in range(positions):
+            board = random_board(variant, moves=seed % 12, seed=seed)
+            mirrored = mirrored_board(board)
+            for stored, looked_up in ((board, mirrored), (mirrored, board)):
+                book, cache = OpeningBook(plies=len(board.moves)), PositionCache()
+                expected = search(looked_up, "O", depth, stats=stats)
+
+                book.search_both_ends(stored, "O", depth)
+                result = search_both_ends(stored, "O", depth, stats=both_stats)
+                cache.add(stored, "O", depth, result)
+                shared.add(stored, "O", depth, result)
+                for name, lookup in (
+                    ("book", book),
+                    ("cache", cache),
+                    ("shared cache", shared),
+                ):
+                    found = lookup.get(looked_up, "O", depth)
+                    assert (
+                        found == expected
+                    ), f"{key} depth {depth} seed {seed} {name}: {found} != {expected}"
+    finally:
+        shared.close(unlink=True)
+
+    print(
+        f"{key:>6} | depth {depth} | book and caches match | both ends cost "
+        f"{both_stats.nodes / stats.nodes:6.1%} of the nodes of a single one"
+    )
+
+
+if __name__ == "__main__":
+    for key, variant in VARIANTS.items():
+        for depth in (1, 3, 5, 7):
+            compare(key, variant, depth)
+    for key, variant in VARIANTS.items():
+        for depth in (1, 3, 5, 7):
+            compare_cached(key, variant, depth)
@@ -0,0 +1,223 @@
+import asyncio
+import multiprocessing
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import AsyncIterator, Literal, Optional
+
+import attrs
+
+from core.engine import Board, leftmost_move, search_both_ends
+from core.position_cache import PositionCache
+
+
+@attrs.define(slots=True)
+class PlyAnalysis:
+    """What the engine thinks of one move. Scores are from the point of view of the player who made it"""
+
+    ply: int = attrs.field()
+    symbol: Literal["O", "X"] = attrs.field()
+    played: int = attrs.field()
+    best_move: Optional[int] = attrs.field()
+    # 1 for a forced win, -1 for a forced loss, 0 if neither is in sight
+    best_score: int = attrs.field()
+    played_score: int = attrs.field()
+
+    @property
+    def mistake(self) -> bool:
+        return self.played_score < self.best_score
+
+
+_SCORES = {1: "win", 0: "even", -1: "loss"}
+_DOTS = {"X": "🔵", "O": "🔴"}
+
+# discord's limit is 4096
+_MAX_DESCRIPTION = 4000
+
+
+def parse_moves(text: str, columns: int) -> list[int]:
+    """
+    Reads the columns of the moves, counted from 1, like `4 4 3 5` or `4,4,3,5`. Boards with less than 10 columns
+    can leave out the separators, like `4435`
+    """
+
+    tokens = [token for token in re.split(r"[\s,]+", text.strip()) if token]
+    if len(tokens) == 1 and columns < 10:
+        tokens = list(tokens[0])
+    if not tokens or not all(token.isdigit() for token in tokens):
+        raise ValueError("Moves have to be column numbers, like `4 4 3 5`")
+    return [int(token) - 1 for token in tokens]
+
+
+def replay(
+    rows: int,
+    columns: int,
+    to_win: int,
+    moves: list[int],
+    first: Literal["O", "X"] = "X",
+) -> list[Board]:
+    """
+    The board before each move, plus the final one. Raises ValueError if a move can not be played, or if the game
+    was already over
+    """
+
+    board = Board(rows=rows, columns=columns, to_win=to_win)
+    boards = [board]
+    symbol = first
+    for ply, position in enumerate(moves, start=1):
+        if board.get_winner_symbol() or board.is_full():
+            raise ValueError(f"The game is already over before move {ply}")
+        if not 0 <= position < columns:
+            raise ValueError(f"Move {ply} is outside of the board")
+
+        board = board.copy()
+        if not board.play(symbol=symbol, position=position):
+            raise ValueError(f"Move {ply} is in a full column")
+        boards.append(board)
+        symbol = "O" if symbol == "X" else "X"
+    return boards
+
+
+def describe(
+    moves: list[int], results: list[Optional[PlyAnalysis]], first: Literal["O", "X"]
+) -> str:
+    """One line per move, the ones that are not analysed yet have a placeholder"""
+
+    second = "O" if first == "X" else "X"
+    lines = []
+    for ply, (played, analysis) in enumerate(zip(moves, results)):
+        line = (
+            f"`{ply + 1:>3}.` {_DOTS[first if ply % 2 == 0 else second]} {played + 1}"
+        )
+        if analysis is None:
+            line += " …"
+        elif analysis.mistake:
+            line += (
+                f" ⚠ best was {analysis.best_move + 1} "
+                f"({_SCORES[analysis.best_score]} instead of {_SCORES[analysis.played_score]})"
+            )
+        else:
+            line += " ✓"
+        lines.append(line)
+
+    description = "\n".join(lines)
+    if len(description) > _MAX_DESCRIPTION:
+        # long games only show what went wrong
+        description = "\n".join(line for line in lines if "✓" not in line)
+    return description[:_MAX_DESCRIPTION]
+
+
+def _search_ply(
+    board: Board, symbol: Literal["O", "X"], played: int, depth: int
+) -> tuple[tuple[int, int], tuple[int, int]]:
+    """
+    Runs in the worker processes. Returns the (best moves, score) of the position and of the opponent after the
+    played move, from `search_both_ends` so they can be cached
+    """
+
+    # both searches look at mostly the same positions
+    table = {}
+    best = search_both_ends(board=board, symbol=symbol, depth=depth, table=table)
+
+    child = board.copy()
+    child.play(symbol=symbol, position=played)
+    reply = search_both_ends(
+        board=child, symbol="O" if symbol == "X" else "X", depth=depth - 1, table=table
+    )
+    return best, reply
+
+
+@attrs.define
+class Analyzer:
+    """
+    Searches every ply of finished games in a pool of worker processes
+
+    The searches are much deeper than the ones of the game, so they run in their own processes and never hold up the
+    bot or the computer's moves. Results are cached by position, players tend to lose the same way
+    """
+
+    workers: int = attrs.field(default=2)
+    depth: int = attrs.field(default=7)
+    cache: PositionCache = attrs.field(
+        factory=lambda: PositionCache(max_entries=50_000)
+    )
+
+    # created on the first analysis
+    _executor: Optional[ProcessPoolExecutor] = attrs.field(init=False, default=None)
+
+    async def analyze(
+        self, boards: list[Board], moves: list[int], first: Literal["O", "X"] = "X"
+    ) -> AsyncIterator[PlyAnalysis]:
+        """Yields the analysis of every move in `moves`, as soon as it is done, so not necessarily in order"""
+
+        if not self._executor:
+            # forking a process with running threads is not safe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+
+        loop = asyncio.get_running_loop()
+        pending = []
+        for ply, (board, played) in enumerate(zip(boards, moves)):
+            symbol = first if ply % 2 == 0 else ("O" if first == "X" else "X")
+            after = boards[ply + 1]
+            other = "O" if symbol == "X" else "X"
+
+            best = self.cache.get(board=board, symbol=symbol, depth=self.depth)
+            reply = self.cache.get(board=after, symbol=other, depth=self.depth - 1)
+            if best is None or reply is None:
+                future = loop.run_in_executor(
+                    self._executor, _search_ply, board, symbol, played, self.depth
+                )
+                pending.append(self._finish(future, ply, board, after, symbol, played))
+            else:
+                yield self._result(ply, symbol, played, best, reply)
+
+        for next_done in asyncio.as_completed(pending):
+            yield await next_done
+
+    async def _finish(
+        self,
+        future: asyncio.Future,
+        ply: int,
+        board: Board,
+        after: Board,
+        symbol: Literal["O", "X"],
+        played: int,
+    ) -> PlyAnalysis:
+        best, reply = await future
+        other = "O" if symbol == "X" else "X"
+        self.cache.add(board=board, symbol=symbol, depth=self.depth, result=best)
+        self.cache.add(board=after, symbol=other, depth=self.depth - 1, result=reply)
+        return self._result(
+            ply,
+            symbol,
+            played,
+            (leftmost_move(best[0]), best[1]),
+            (leftmost_move(reply[0]), reply[1]),
+        )
+
+    @staticmethod
+    def _result(
+        ply: int,
+        symbol: Literal["O", "X"],
+        played: int,
+        best: tuple[Optional[int], int],
+        reply: tuple[Optional[int], int],
+    ) -> PlyAnalysis:
+        best_move, best_score = best
+        # the opponent's score after the move, or who won with it
+        _, reply_score = reply
+        return PlyAnalysis(
+            ply=ply,
+            symbol=symbol,
+            played=played,
+            best_move=best_move,
+            best_score=best_score,
+            played_score=-reply_score,
+        )
+
+    def close(self):
+        if self._executor:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
@@ -3,6 +3,8 @@ import os
 
 from naff import Client, listen, logger_name
 
+from core.startup import startup_timer
+
 
 class CustomClient(Client):
     """Subclass of naff.Client with our own logger and on_startup event"""
@@ -14,7 +16,10 @@ class CustomClient(Client):
     async def on_startup(self):
         """Gets triggered on startup"""
 
-        self.logger.info(f"{os.getenv('PROJECT_NAME')} - Startup Finished!")
+        startup_timer.mark("connecting to discord")
+        self.logger.info(
+            f"{os.getenv('PROJECT_NAME')} - Startup Finished!\n{startup_timer}"
+        )
         self.logger.info(
             "Note: Discord needs up to an hour to load your global commands / context menus. They may not appear immediately\n"
         )
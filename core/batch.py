@@ -0,0 +1,144 @@
+from typing import Iterable
+
+import attrs
+import numpy as np
+
+from core.engine import Board
+
+# cell values of the board arrays
+EMPTY, X, O = 0, 1, -1
+
+# score of a finished line, every other line is worth 4 ** pieces in it
+WIN_SCORE = 1_000_000
+
+
+@attrs.define
+class Evaluation:
+    """The results of `evaluate()`, one entry per board"""
+
+    # 1 if X won, -1 if O won, 0 otherwise
+    winners: np.ndarray
+    # (N, columns), True for the columns that are not full yet
+    valid_moves: np.ndarray
+    # positive numbers are good for X, negative ones for O
+    scores: np.ndarray
+
+
+def to_array(boards: Iterable[Board]) -> np.ndarray:
+    """
+    Converts boards of the same size into an (N, rows, columns) int8 array with 1 for X, -1 for O and 0 for empty
+    cells. Row 0 is the top row
+    """
+
+    boards = list(boards)
+    if not boards:
+        return np.zeros((0, 0, 0), dtype=np.int8)
+
+    geometry = boards[0].geometry
+    size = geometry.columns * geometry.height
+    length = (size + 7) // 8
+
+    def unpack(symbol: str) -> np.ndarray:
+        raw = np.frombuffer(
+            b"".join(
+                board.pieces[symbol].to_bytes(length, "little") for board in boards
+            ),
+            np.uint8,
+        )
+        bits = np.unpackbits(
+            raw.reshape(len(boards), length), axis=1, bitorder="little"
+        )[:, :size]
+
+        # (N, columns, height) with the bottom cell first -> (N, rows, columns) with the top row first
+        bits = bits.reshape(len(boards), geometry.columns, geometry.height)[
+            :, :, : geometry.rows
+        ]
+        return bits.transpose(0, 2, 1)[:, ::-1, :]
+
+    return unpack("X").astype(np.int8) - unpack("O").astype(np.int8)
+
+
+def line_sums(cells: np.ndarray, to_win: int) -> list[np.ndarray]:
+    """
+    Sums up every window of `to_win` cells in a row, one array per direction
+
+    This is a convolution with a line of ones, done as the sum of `to_win` shifted views so nothing is copied until
+    the additions
+    """
+
+    _, rows, columns = cells.shape
+    cells = cells.astype(np.int16)
+    sums = []
+    if columns >= to_win:
+        sums.append(
+            sum(cells[:, :, i : columns - to_win + 1 + i] for i in range(to_win))
+        )
+    if rows >= to_win:
+        sums.append(sum(cells[:, i : rows - to_win + 1 + i, :] for i in range(to_win)))
+    if rows >= to_win and columns >= to_win:
+        sums.append(
+            sum(
+                cells[:, i : rows - to_win + 1 + i, i : columns - to_win + 1 + i]
+                for i in range(to_win)
+            )
+        )
+        sums.append(
+            sum(
+                cells[:, i : rows - to_win + 1 + i, to_win - 1 - i : columns - i]
+                for i in range(to_win)
+            )
+        )
+    return sums
+
+
+def winners(cells: np.ndarray, to_win: int) -> np.ndarray:
+    """1 for the boards X won, -1 for the ones O won and 0 for the others. Like `Board.get_winner_symbol`, O wins ties"""
+
+    n = cells.shape[0]
+    x_won = np.zeros(n, dtype=bool)
+    o_won = np.zeros(n, dtype=bool)
+    for sums in line_sums(cells, to_win):
+        sums = sums.reshape(n, -1)
+        x_won |= (sums == to_win).any(axis=1)
+        o_won |= (sums == -to_win).any(axis=1)
+    return np.where(o_won, O, np.where(x_won, X, EMPTY)).astype(np.int8)
+
+
+def valid_moves(cells: np.ndarray) -> np.ndarray:
+    """(N, columns), True for the columns that are not full yet"""
+
+    return cells[:, 0, :] == EMPTY
+
+
+def scores(cells: np.ndarray, to_win: int) -> np.ndarray:
+    """
+    Heuristic score of every board from the point of view of X
+
+    Every line of `to_win` cells that only holds pieces of one player counts for that player, the more pieces the
+    more it is worth
+    """
+
+    n = cells.shape[0]
+    weights = np.array(
+        [0] + [4**pieces for pieces in range(1, to_win)] + [WIN_SCORE], dtype=np.int64
+    )
+
+    total = np.zeros(n, dtype=np.int64)
+    for x_count, o_count in zip(
+        line_sums(cells == X, to_win), line_sums(cells == O, to_win)
+    ):
+        x_count = x_count.reshape(n, -1)
+        o_count = o_count.reshape(n, -1)
+        total += np.where(o_count == 0, weights[x_count], 0).sum(axis=1)
+        total -= np.where(x_count == 0, weights[o_count], 0).sum(axis=1)
+    return total
+
+
+def evaluate(cells: np.ndarray, to_win: int) -> Evaluation:
+    """Evaluates a whole (N, rows, columns) array of boards at once"""
+
+    return Evaluation(
+        winners=winners(cells, to_win),
+        valid_moves=valid_moves(cells),
+        scores=scores(cells, to_win),
+    )
@@ -1,30 +1,45 @@
+import array
 import asyncio
 import copy
 import logging
-import math
 import random
+import time
 from typing import Literal, Optional
 
 import attrs
-from anyio import to_thread
-from naff import (
-    Button,
-    ButtonStyles,
-    ComponentContext,
-    Embed,
-    InteractionContext,
-    Member,
-    Message,
-)
+from naff import ComponentContext, InteractionContext, Member, User
+from rich import box
 from rich.console import Console
 from rich.table import Table
 from rich.text import Text
-from rich import box
 
+from core.analysis import Analyzer, describe, replay
+from core.difficulty import DIFFICULTIES, Difficulty
+from core.edits import EditPriority, EditScheduler, MessageRef
+from core.engine import VARIANTS, Board, Variant, get_geometry, leftmost_move
 from core.misc import embed_message
-
+from core.move_log import GameRecord, MoveLog
+from core.opening_book import OpeningBook
+from core.payloads import PayloadBuilder
+from core.ponder import Ponderer
+from core.position_cache import PositionCache, SharedPositionCache
+from core.scheduler import SearchScheduler
 
 _games: dict[int, "Connect4"] = {}
+_opening_book = OpeningBook()
+_position_cache: PositionCache | SharedPositionCache = PositionCache()
+_ponderer = Ponderer(cache=_position_cache)
+_scheduler = SearchScheduler()
+_edits = EditScheduler()
+_move_log = MoveLog()
+_analyzer = Analyzer(
+    depth=max(d.depth for d in DIFFICULTIES.values() if d.engine == "minimax")
+)
+# player id -> their last finished game, so they can analyse it
+_last_games: dict[int, GameRecord] = {}
+_MAX_LAST_GAMES = 10_000
+# mirror messages per game
+_MAX_SPECTATORS = 25
 
 
 @attrs.define
@@ -37,145 +52,266 @@ class GameExists(Exception):
 
 @attrs.define(init=False)
 class Connect4:
-    ctx: InteractionContext = attrs.field()
+    """
+    One running game
+
+    Thousands of these can be alive at once, so they keep no naff objects, only ids and names. The ones that are
+    needed now and then, like the author for an embed, are looked up in the cache when they are used
+    """
+
+    author_id: int = attrs.field()
+    guild_id: Optional[int] = attrs.field()
     pvp: bool = attrs.field()
     pvp_difficulty: int = attrs.field(default=0)
+    rows: int = attrs.field(default=6)
+    columns: int = attrs.field(default=7)
     to_win: int = attrs.field(default=4)
 
-    message: Message = attrs.field(init=False)
+    message: MessageRef = attrs.field(init=False)
     logger = attrs.field(init=False, default=logging.getLogger("Connect4"))
-    lock = attrs.field(init=False, default=asyncio.Lock())
+    # one per game, a shared one would make all games wait for each other's searches
+    lock = attrs.field(init=False, factory=asyncio.Lock)
 
-    _field: list[list[Literal["_", "O", "X"]]] = attrs.field(init=False)
-    _components: list[Button] = attrs.field(init=False)
+    _board: Board = attrs.field(init=False)
+    _payloads: PayloadBuilder = attrs.field(init=False)
     _player_one_turn: bool = attrs.field(
         init=False, default=random.choice([True, False])
     )
-    _player_one: Member = attrs.field(init=False)
-    _player_two: Optional[Member] = attrs.field(init=False, default=None)
+    _player_one_name: str = attrs.field(init=False)
+    _player_two_id: Optional[int] = attrs.field(init=False, default=None)
+    _player_two_name: Optional[str] = attrs.field(init=False, default=None)
     _player_one_cursor: int = attrs.field(init=False)
     _player_two_cursor: int = attrs.field(init=False)
-    _pvp_chance_to_fail: float = attrs.field(init=False)
+    _difficulty: Difficulty = attrs.field(init=False)
+    _first_symbol: Literal["O", "X"] = attrs.field(init=False)
+    # mirror messages that show the game in other channels
+    _spectators: list[MessageRef] = attrs.field(init=False, factory=list)
+    # what the mirrors show once the game is over, for the ones that were sent while it ended
+    _final_embed: Optional[dict] = attrs.field(init=False, default=None)
+    # seconds each computer move took
+    _ai_latencies: array.array = attrs.field(
+        init=False, factory=lambda: array.array("f")
+    )
 
     def __init__(self, ctx: InteractionContext, *args, **kwargs):
         # do not allow multiple games
         if game := _games.get(ctx.author.id):
             raise GameExists(game)
-        self.__attrs_init__(ctx, *args, **kwargs)
+        self.__attrs_init__(
+            int(ctx.author.id),
+            int(ctx.guild_id) if ctx.guild_id else None,
+            *args,
+            **kwargs,
+        )
+
+        self._player_one_name = ctx.author.display_name
+        self._payloads = PayloadBuilder.for_author(ctx.author, "Connect 4 Game")
 
     def __attrs_post_init__(self):
-        self._player_one = self.ctx.author
-
-        match self.pvp_difficulty:
-            case 1:
-                self._pvp_chance_to_fail = 0.2
-            case 2:
-                self._pvp_chance_to_fail = 0.15
-            case 3:
-                self._pvp_chance_to_fail = 0.1
-            case _:
-                self._pvp_chance_to_fail = 0
-
-        self._field = [
-            ["_", "_", "_", "_", "_", "_", "_"],
-            ["_", "_", "_", "_", "_", "_", "_"],
-            ["_", "_", "_", "_", "_", "_", "_"],
-            ["_", "_", "_", "_", "_", "_", "_"],
-            ["_", "_", "_", "_", "_", "_", "_"],
-            ["_", "_", "_", "_", "_", "_", "_"],
-        ]
-        self._components = [
-            Button(
-                custom_id=f"{self.ctx.author.id}|left_full",
-                style=ButtonStyles.BLUE,
-                label="«",
-            ),
-            Button(
-                custom_id=f"{self.ctx.author.id}|left_one",
-                style=ButtonStyles.BLUE,
-                label="‹",
-            ),
-            Button(
-                custom_id=f"{self.ctx.author.id}|submit",
-                style=ButtonStyles.BLUE,
-                label="🢃",
-            ),
-            Button(
-                custom_id=f"{self.ctx.author.id}|right_one",
-                style=ButtonStyles.BLUE,
-                label="›",
-            ),
-            Button(
-                custom_id=f"{self.ctx.author.id}|right_full",
-                style=ButtonStyles.BLUE,
-                label="»",
-            ),
-        ]
-
-        self._player_one_cursor = int(len(self._field[0]) / 2)
+        self._difficulty = DIFFICULTIES[self.pvp_difficulty]
+
+        self._board = Board(rows=self.rows, columns=self.columns, to_win=self.to_win)
+
+        self._player_one_cursor = int(self.columns / 2)
         self._player_two_cursor = self._player_one_cursor
+        self._first_symbol = "X" if self._player_one_turn else "O"
 
     @classmethod
     def get_existing(cls, author_id: int) -> Optional["Connect4"]:
         return _games.get(author_id)
 
-    async def play(self):
-        _games[self.ctx.author.id] = self
+    @staticmethod
+    def use_shared_cache(name: str, slots: int):
+        """Share the search results with all other processes using the cache with the same name"""
+
+        global _position_cache
+        _position_cache = SharedPositionCache(name=name, slots=slots)
+        _ponderer.cache = _position_cache
+
+    @staticmethod
+    def enable_pondering(cpu_share: float = 0.5):
+        """Let the computer think ahead while the players are moving their cursor"""
+
+        _ponderer.cpu_share = cpu_share
+        _ponderer.start()
+
+    @staticmethod
+    def enable_move_log(directory: str):
+        """Record every finished game in the move log in `directory`"""
+
+        _move_log.directory = directory
+        _move_log.start()
+
+    @staticmethod
+    async def analyze(
+        ctx: InteractionContext,
+        variant: Optional[Variant] = None,
+        moves: Optional[list[int]] = None,
+    ):
+        """
+        Shows the best move of every ply next to the played one. Without `moves`, the last finished game of the
+        author is analysed. The message is updated as the plies are done
+        """
+
+        if moves is None:
+            record = _last_games.get(ctx.author.id)
+            if not record:
+                await ctx.send(
+                    embeds=embed_message(
+                        "Connect 4 Analysis",
+                        "You have not finished a game yet, play one or pass the moves of a game",
+                        member=ctx.author,
+                    ),
+                    ephemeral=True,
+                )
+                return
+            rows, columns, to_win = record.rows, record.columns, record.to_win
+            moves, first = record.moves, record.first
+        else:
+            variant = variant or VARIANTS["6x7"]
+            rows, columns, to_win = variant.rows, variant.columns, variant.to_win
+            first = "X"
+
+        if not moves:
+            await ctx.send(
+                embeds=embed_message(
+                    "Connect 4 Analysis",
+                    "There are no moves to analyse",
+                    member=ctx.author,
+                ),
+                ephemeral=True,
+            )
+            return
+
+        try:
+            boards = replay(
+                rows=rows, columns=columns, to_win=to_win, moves=moves, first=first
+            )
+        except ValueError as error:
+            await ctx.send(
+                embeds=embed_message(
+                    "Connect 4 Analysis", str(error), member=ctx.author
+                ),
+                ephemeral=True,
+            )
+            return
+
+        payloads = PayloadBuilder.for_author(ctx.author, "Connect 4 Analysis")
+        footer = f"{rows}x{columns}, {to_win} in a row - looking {_analyzer.depth} moves ahead"
+        results = [None] * len(moves)
+        message = MessageRef.from_message(
+            await ctx.send(
+                embeds=payloads.embed(
+                    description=describe(moves, results, first),
+                    footer=f"{footer} - analysing...",
+                )
+            )
+        )
+
+        async for analysis in _analyzer.analyze(
+            boards=boards, moves=moves, first=first
+        ):
+            results[analysis.ply] = analysis
+            done = all(result is not None for result in results)
+            await _edits.submit(
+                message,
+                EditPriority.ANALYSIS,
+                embeds=payloads.embed(
+                    description=describe(moves, results, first),
+                    footer=f"{footer} - {sum(result.mistake for result in results)} mistakes"
+                    if done
+                    else f"{footer} - analysing...",
+                ),
+            )
+
+    @staticmethod
+    def warm_up(book_depth: int = 5):
+        """
+        Builds everything the first games would otherwise have to build, call it before the bot accepts interactions
+
+        The opening book of the default board is filled for every minimax difficulty up to `book_depth`, 0 skips it
+        """
+
+        for variant in VARIANTS.values():
+            get_geometry(variant.rows, variant.columns, variant.to_win)
+
+        # rich caches parsed styles and character widths
+        console = Console(color_system="truecolor")
+        table = Table(show_header=False, show_footer=False, box=box.HEAVY)
+        table.add_column(justify="center", vertical="middle")
+        for style in ("white", "red", "blue", "green"):
+            table.add_row(Text(" ⬤ ", style=style))
+        with console.capture():
+            console.print(table)
+
+        if book_depth:
+            classic = VARIANTS["6x7"]
+            for depth in sorted(
+                {d.depth for d in DIFFICULTIES.values() if d.engine == "minimax"}
+            ):
+                if depth <= book_depth:
+                    _opening_book.build(
+                        rows=classic.rows,
+                        columns=classic.columns,
+                        to_win=classic.to_win,
+                        depth=depth,
+                    )
+
+    async def play(self, ctx: InteractionContext):
+        _games[self.author_id] = self
 
         # send initial message
-        self.message = await self.ctx.send(
+        message = await ctx.send(
             embeds=self.get_embed(), components=self.get_components()
         )
+        self.message = MessageRef.from_message(message)
 
         # make the pvp turn if that is next
-        if self.pvp and not self._player_one_turn:
-            await self.computer_turn()
+        if self.pvp:
+            if not self._player_one_turn:
+                await self.computer_turn()
+            else:
+                self._ponder()
 
     def get_embed(
         self,
         winning_coords: Optional[list[tuple[int, int]]] = None,
         game_over: bool = False,
-    ) -> Embed:
+    ) -> dict:
         if winning_coords is None:
             winning_coords = []
 
         if self._player_one_turn:
             if not winning_coords:
-                footer = f"{self._player_one.display_name}'s turn"
+                footer = f"{self._player_one_name}'s turn"
             elif self.pvp:
                 footer = "Computer won!"
             else:
-                footer = f"{self._player_two.display_name} won!"
+                footer = f"{self._player_two_name} won!"
         elif self.pvp:
             footer = (
                 "Computer is thinking..."
                 if not winning_coords
-                else f"{self._player_one.display_name} won!"
+                else f"{self._player_one_name} won!"
             )
-        elif self._player_two:
+        elif self._player_two_id:
             footer = (
-                f"{self._player_two.display_name}'s turn"
+                f"{self._player_two_name}'s turn"
                 if not winning_coords
-                else f"{self._player_one.display_name} won!"
+                else f"{self._player_one_name} won!"
             )
         else:
             footer = "Waiting for player..."
 
-        embed = embed_message(
-            "Connect 4 Game",
-            footer=footer if not game_over else "Game Over! Nobody won",
-            member=self.ctx.author,
-        )
-
         # which player is what
         console = Console(color_system="truecolor")
-        player_two_name = self._player_two.display_name if self._player_two else "Waiting for player..."
+        player_two_name = self._player_two_name or "Waiting for player..."
         players = Text.assemble(
             ("● ", "white"),
             " - Free\n",
             ("●", "blue"),
             ("●", "green") if winning_coords and not self._player_one_turn else " ",
-            f" - {self.ctx.author.display_name}\n",
+            f" - {self._player_one_name}\n",
             ("●", "red"),
             ("●", "green") if winning_coords and self._player_one_turn else " ",
             " - Computer" if self.pvp else f" - {player_two_name}",
@@ -187,7 +323,7 @@ class Connect4:
         # create the tables
         game = Table(show_header=False, show_footer=False, box=box.HEAVY)
         heading_rows = []
-        for i in range(len(self._field[0])):
+        for i in range(self.columns):
             game.add_column(justify="center", vertical="middle")
             style = "white"
             if self._player_one_turn:
@@ -202,9 +338,11 @@ class Connect4:
         heading.padding = 0
         heading.add_row(*heading_rows)
 
-        for i, row in enumerate(self._field):
+        for i in range(self.rows):
             formatted = []
-            for j, col in enumerate(row):
+            for j in range(self.columns):
+                col = self._board.cell(i, j)
+
                 # check if winning coords
                 won = False
                 if (i, j) in winning_coords:
@@ -231,147 +369,74 @@ class Connect4:
             console.print(game)
         table_text = "\n".join(capture.get().split("\n")[1:-2])
 
-        embed.description = f"""```ansi\n{players_text}\n```\n```ansi\n{heading_text if not winning_coords and not game_over else ""}\n{table_text}\n```"""
-        return embed
-
-    def get_components(self) -> list[Button]:
-        for component in self._components:
-            if self._player_one_turn:
-                component.style = ButtonStyles.BLUE
-            else:
-                component.style = ButtonStyles.RED
+        return self._payloads.embed(
+            description=f"""```ansi\n{players_text}\n```\n```ansi\n{heading_text if not winning_coords and not game_over else ""}\n{table_text}\n```""",
+            footer=footer if not game_over else "Game Over! Nobody won",
+        )
 
+    def get_components(self) -> list[dict]:
         # disable when it's not the players turn
-        if self.pvp:
-            for component in self._components:
-                component.disabled = not self._player_one_turn
-        return self._components
+        return self._payloads.components(
+            player_one_turn=self._player_one_turn,
+            disabled=self.pvp and not self._player_one_turn,
+        )
 
-    def check_won(
-        self,
-        symbol: Literal["O", "X"],
-        field: Optional[list[list[Literal["_", "O", "X"]]]] = None,
-    ) -> Optional[list[tuple[int, int]]]:
-        """Returns a tuple of the indexes that mean the player has won -> (x,y)"""
+    async def spectate(self, ctx: InteractionContext):
+        """Sends a copy of the game to the channel of `ctx`, which is kept up to date until the game ends"""
+
+        if len(self._spectators) >= _MAX_SPECTATORS:
+            await ctx.send(
+                embeds=embed_message(
+                    "Connect 4 Game",
+                    "This game already has too many spectators, please watch one of the others",
+                    member=ctx.author,
+                ),
+                ephemeral=True,
+            )
+            return
+
+        spectator = MessageRef.from_message(await ctx.send(embeds=self.get_embed()))
+        if _games.get(self.author_id) is not self:
+            # the game ended while the mirror was sent, it missed the last broadcast
+            await _edits.submit(
+                spectator,
+                EditPriority.GAME_OVER,
+                embeds=self._final_embed or self.get_embed(game_over=True),
+            )
+            return
+        self._spectators.append(spectator)
 
-        if not field:
-            field = self._field
-
-        # going from top to bot, saving the results in a tuple of 3 (diagonal to left, to bot, diagonal to right, same row left) per column
-        results: list[list[list[int, int, int, int]]] = [
-            [[0, 0, 0, 0] for _ in range(len(field[0]))] for _ in range(len(field))
-        ]
-        winning_coords: Optional[list[tuple[int, int]]] = None
-
-        # this is O(N+1), so good enough
-        for i, row in enumerate(field):
-            for j, col in enumerate(row):
-                if col == symbol:
-                    # left
-                    k = 0
-                    self.__set_value(
-                        results=results,
-                        i=i,
-                        j=j,
-                        k=k,
-                        new_value=self.__get_value(
-                            results=results,
-                            i=i - 1,
-                            j=j + 1,
-                            k=k,
-                        )
-                        + 1,
-                    )
+    async def _broadcast(self, priority: EditPriority, embed: dict):
+        """
+        Shows the already rendered `embed` on every mirror message
 
-                    # middle
-                    k = 1
-                    self.__set_value(
-                        results=results,
-                        i=i,
-                        j=j,
-                        k=k,
-                        new_value=self.__get_value(
-                            results=results,
-                            i=i - 1,
-                            j=j,
-                            k=k,
-                        )
-                        + 1,
-                    )
+        The edits are only queued, so a slow channel only delays itself, and it skips the states it had no time for
+        """
 
-                    # right
-                    k = 2
-                    self.__set_value(
-                        results=results,
-                        i=i,
-                        j=j,
-                        k=k,
-                        new_value=self.__get_value(
-                            results=results,
-                            i=i - 1,
-                            j=j - 1,
-                            k=k,
-                        )
-                        + 1,
-                    )
+        if priority == EditPriority.GAME_OVER:
+            self._final_embed = embed
+        for spectator in tuple(self._spectators):
+            await _edits.submit(
+                spectator, priority, on_not_found=self._drop_spectator, embeds=embed
+            )
 
-                    # same row
-                    k = 3
-                    self.__set_value(
-                        results=results,
-                        i=i,
-                        j=j,
-                        k=k,
-                        new_value=self.__get_value(
-                            results=results,
-                            i=i,
-                            j=j - 1,
-                            k=k,
-                        )
-                        + 1,
-                    )
+    def _drop_spectator(self, spectator: MessageRef):
+        """The mirror message was deleted, stop updating it"""
 
-            # check if any winners are found
-            try:
-                for j, col in enumerate(results[i]):
-                    for k, entry in enumerate(col):
-                        if entry == self.to_win:
-                            # get the winnings coords
-                            winning_coords = []
-                            for z in range(self.to_win):
-                                match k:
-                                    case 0:
-                                        winning_coords.append((i - z, j + z))
-                                    case 1:
-                                        winning_coords.append((i - z, j))
-                                    case 2:
-                                        winning_coords.append((i - z, j - z))
-                                    case 3:
-                                        winning_coords.append((i, j - z))
-                            raise StopIteration
-
-            except StopIteration:
-                break
-
-        return winning_coords
+        if spectator in self._spectators:
+            self._spectators.remove(spectator)
 
-    @staticmethod
-    def __get_value(
-        results: list[list[list[int, int, int]]], i: int, j: int, k: int
-    ) -> int:
-        try:
-            return results[i][j][k]
-        except IndexError:
-            return 0
+    def _get_author(self, ctx: ComponentContext) -> Optional[Member | User]:
+        """The author of the game, if naff still has them cached"""
 
-    @staticmethod
-    def __set_value(
-        results: list[list[list[int, int, int]]], i: int, j: int, k: int, new_value: int
-    ):
-        try:
-            results[i][j][k] = new_value
-        except IndexError:
-            pass
+        if self.guild_id:
+            return ctx.bot.cache.get_member(self.guild_id, self.author_id)
+        return ctx.bot.cache.get_user(self.author_id)
+
+    def check_won(self, symbol: Literal["O", "X"]) -> Optional[list[tuple[int, int]]]:
+        """Returns a tuple of the indexes that mean the player has won -> (x,y)"""
+
+        return self._board.winning_cells(symbol)
 
     async def move_cursor(
         self,
@@ -380,12 +445,12 @@ class Connect4:
     ):
         # correct player?
         if self._player_one_turn:
-            if ctx.author != self._player_one:
+            if ctx.author.id != self.author_id:
                 await ctx.send(
                     embeds=embed_message(
                         "Connect 4 Game",
-                        f"**Not your turn!**\nIt's {self._player_one.mention}'s turn",
-                        member=self.ctx.author,
+                        f"**Not your turn!**\nIt's <@{self.author_id}>'s turn",
+                        member=self._get_author(ctx),
                     ),
                     ephemeral=True,
                 )
@@ -393,25 +458,26 @@ class Connect4:
         else:
             if self.pvp:
                 return
-            if not self._player_two:
-                if ctx.author == self._player_one:
+            if not self._player_two_id:
+                if ctx.author.id == self.author_id:
                     await ctx.send(
                         embeds=embed_message(
                             "Connect 4 Game",
                             f"You cannot play vs yourself.",
-                            member=self.ctx.author,
+                            member=self._get_author(ctx),
                         ),
                         ephemeral=True,
                     )
                     return
-                self._player_two = ctx.author
+                self._player_two_id = int(ctx.author.id)
+                self._player_two_name = ctx.author.display_name
             else:
-                if self._player_two != ctx.author:
+                if self._player_two_id != ctx.author.id:
                     await ctx.send(
                         embeds=embed_message(
                             "Connect 4 Game",
-                            f"**Not your turn!**\nIt's {self._player_two.mention}'s turn",
-                            member=self.ctx.author,
+                            f"**Not your turn!**\nIt's <@{self._player_two_id}>'s turn",
+                            member=self._get_author(ctx),
                         ),
                         ephemeral=True,
                     )
@@ -422,7 +488,7 @@ class Connect4:
         else:
             position = self._player_two_cursor
 
-        max_len = len(self._field[0]) - 1
+        max_len = self.columns - 1
         match move:
             case "left_full":
                 position = 0
@@ -438,37 +504,19 @@ class Connect4:
 
         if self._player_one_turn:
             self._player_one_cursor = position
+            if self.pvp:
+                _ponderer.prioritize(game_id=self.author_id, cursor=position)
         else:
             self._player_two_cursor = position
-        await ctx.edit_origin(embeds=self.get_embed())
-
-    def insert_piece(
-        self,
-        symbol: Literal["O", "X"],
-        position: int,
-        field: Optional[list[list[Literal["_", "O", "X"]]]] = None,
-    ) -> Optional[list[list[Literal["_", "O", "X"]]]]:
-        if not field:
-            field = self._field
-
-        # check if this col is already full
-        if field[0][position] != "_":
-            return None
-
-        # insert the symbol in the row before the first symbol is found or the last row
-        for i, row in enumerate(field):
-            if row[position] != "_":
-                field[i - 1][position] = symbol  # noqa
-                return field
-        field[i][position] = symbol  # noqa
-        return field
+        embed = self.get_embed()
+        await _edits.respond(ctx, self.message, EditPriority.CURSOR, embeds=embed)
+        await self._broadcast(EditPriority.CURSOR, embed)
 
     async def do_turn(self, position: int, ctx: Optional[ComponentContext] = None):
-        edit_call = ctx.edit_origin if ctx else self.message.edit
         symbol = "X" if self._player_one_turn else "O"
 
         # play round
-        if not self.insert_piece(symbol=symbol, position=position):  # noqa
+        if not self._board.play(symbol=symbol, position=position):
             if ctx:
                 await ctx.send(
                     embeds=embed_message(
@@ -481,143 +529,152 @@ class Connect4:
                 return
 
         # check winner
-        winning_coords = self.check_won(symbol=symbol)  # noqa
+        winning_coords = self.check_won(symbol=symbol)
         game_over = self.check_game_over(winning_coords)
 
         # flip whose turn it is before sending embed
         self._player_one_turn = not self._player_one_turn
-        await edit_call(
-            embeds=self.get_embed(winning_coords=winning_coords, game_over=game_over),
-            components=[]
-            if bool(winning_coords) or game_over
-            else self.get_components(),
+        priority = (
+            EditPriority.GAME_OVER
+            if winning_coords or game_over
+            else EditPriority.SUBMIT
         )
+        embed = self.get_embed(winning_coords=winning_coords, game_over=game_over)
+        components = [] if bool(winning_coords) or game_over else self.get_components()
+        if ctx:
+            await _edits.respond(
+                ctx, self.message, priority, embeds=embed, components=components
+            )
+        else:
+            await _edits.submit(
+                self.message, priority, embeds=embed, components=components
+            )
+        await self._broadcast(priority, embed)
 
         if winning_coords or game_over:
-            _games.pop(self.ctx.author.id)
-        else:
+            _games.pop(self.author_id)
+            _ponderer.cancel(game_id=self.author_id)
+            self._record(outcome=symbol if winning_coords else "draw")
+        elif self.pvp:
             # next computer turn
-            if self.pvp and not self._player_one_turn:
+            if not self._player_one_turn:
                 await self.computer_turn()
 
+            else:
+                self._ponder()
+
     def check_game_over(
-        self,
-        winning_coords: Optional[list[tuple[int, int]]] = None,
-        field: Optional[list[list[Literal["_", "O", "X"]]]] = None,
+        self, winning_coords: Optional[list[tuple[int, int]]] = None
     ) -> bool:
-        if not field:
-            field = self._field
-
         if winning_coords:
             return False
-        elif not self._get_valid_moves(field):
+        elif self._board.is_full():
             return True
         return False
 
-    def _get_valid_moves(
-        self, field: Optional[list[list[Literal["_", "O", "X"]]]] = None
-    ) -> list[int]:
-        if not field:
-            field = self._field
+    def _ponder(self):
+        """Think about the answers while the player is choosing"""
 
-        valid = []
-        for i, col in enumerate(field[0]):
-            if col == "_":
-                valid.append(i)
-        return valid
+        # monte carlo results are not cached
+        if self._difficulty.engine != "minimax":
+            return
+
+        _ponderer.ponder(
+            game_id=self.author_id,
+            board=self._board,
+            symbol="O",
+            depth=self._difficulty.depth,
+            cursor=self._player_one_cursor,
+        )
 
     async def computer_turn(self):
-        best_position = await to_thread.run_sync(lambda: self._computer_minimax())
+        _ponderer.cancel(game_id=self.author_id)
+        start = time.perf_counter()
+        with _ponderer.searching():
+            if self._difficulty.engine == "mcts":
+                best_position = await _scheduler.run(
+                    group=self.guild_id or self.author_id,
+                    depth=self._difficulty.depth,
+                    search=self._computer_mcts,
+                    # it runs for its time budget, no matter how shallow
+                    timed=True,
+                )
+            else:
+                best_position = await _scheduler.run(
+                    group=self.guild_id or self.author_id,
+                    depth=self._difficulty.depth,
+                    search=self._computer_minimax,
+                    cheap=_position_cache.contains(
+                        board=self._board, symbol="O", depth=self._difficulty.depth
+                    ),
+                )
+        self._ai_latencies.append(time.perf_counter() - start)
 
         await self.do_turn(position=best_position)
 
-    def get_winner_symbol(
-        self, field: Optional[list[list[Literal["_", "O", "X"]]]] = None
-    ) -> Optional[Literal["O", "X"]]:
-        if not field:
-            field = self._field
-
-        if self.check_won("O", field=field):
-            return "O"
-        elif self.check_won("X", field=field):
-            return "X"
-        return None
-
-    def _computer_minimax(self) -> int:
-        best_move, score = self.__computer_minimax(
-            is_maximizing=True,
-            depth=self.pvp_difficulty,
-            field=copy.deepcopy(self._field),
-        )
+    def _computer_minimax(self, depth: int) -> int:
+        # other games (or pondering) might have searched this position already
+        result = _position_cache.get(board=self._board, symbol="O", depth=depth)
+        if result is None:
+            best_moves, score = _opening_book.search_both_ends(
+                board=self._board, symbol="O", depth=depth
+            )
+            _position_cache.add(
+                board=self._board, symbol="O", depth=depth, result=(best_moves, score)
+            )
+            result = leftmost_move(best_moves), score
+        best_move, score = result
+
         # rarely ignore the minimax suggestions
-        if best_move and random.random() > self._pvp_chance_to_fail:
+        if best_move is not None and random.random() > self._difficulty.chance_to_fail:
             return best_move
         else:
-            return random.choice(self._get_valid_moves())
+            return random.choice(self._board.valid_moves())
 
-    def __computer_minimax(
-        self,
-        is_maximizing: bool,
-        depth: int,
-        field: list[list[Literal["_", "O", "X"]]],
-        alpha: int = -math.inf,
-        beta: int = math.inf,
-    ) -> tuple[Optional[int], int]:
-        # anyone won?
-        # game over?
-        # max depth reached?
-        winner = self.get_winner_symbol(field)
-        valid_moves = self._get_valid_moves(field)
-        if depth == 0 or winner or not valid_moves:
-            match winner:
-                case "O":
-                    return None, 1
-                case "X":
-                    return None, -1
-                case None:
-                    return None, 0
-
-        # max scores for each option
-        if is_maximizing:
-            best_score = -math.inf
-            symbol = "O"
-        else:
-            best_score = math.inf
-            symbol = "X"
-
-        # check each possible play
-        best_move = None
-        for cursor_position in valid_moves:
-            field_copy = copy.deepcopy(field)
-            self.insert_piece(
-                symbol=symbol, position=cursor_position, field=field_copy  # noqa
-            )
-            _, minimax_score = self.__computer_minimax(
-                is_maximizing=not is_maximizing,
-                field=field_copy,
-                depth=depth - 1,
-                alpha=alpha,
-                beta=beta,
-            )
+    def _computer_mcts(self, depth: int) -> int:
+        # numpy takes a while to import and only this difficulty needs it
+        from core.mcts import mcts
 
-            # alpha beta pruning -> https://en.wikipedia.org/wiki/Alpha%E2%80%93beta_pruning
-            if is_maximizing:
-                if minimax_score > best_score:
-                    best_score = minimax_score
-                    best_move = cursor_position
-                if best_score >= beta:
-                    break
-                alpha = max(alpha, best_score)
-            else:
-                if minimax_score < best_score:
-                    best_score = minimax_score
-                    best_move = cursor_position
-                if best_score <= alpha:
-                    break
-                beta = min(beta, best_score)
+        # the scheduler lowers the depth when the bot is overloaded, the time budget shrinks accordingly
+        seconds = self._difficulty.seconds * depth / self._difficulty.depth
+        best_move = mcts(board=self._board, symbol="O", seconds=seconds)
 
-        return best_move, best_score
+        # rarely ignore the mcts suggestions
+        if best_move is not None and random.random() > self._difficulty.chance_to_fail:
+            return best_move
+        else:
+            return random.choice(self._board.valid_moves())
 
     async def disable(self):
-        await self.message.edit(embeds=self.get_embed(game_over=True), components=[])
-        _games.pop(self.ctx.author.id)
+        embed = self.get_embed(game_over=True)
+        await _edits.submit(
+            self.message, EditPriority.GAME_OVER, embeds=embed, components=[]
+        )
+        await self._broadcast(EditPriority.GAME_OVER, embed)
+        _games.pop(self.author_id)
+        _ponderer.cancel(game_id=self.author_id)
+        self._record(outcome="abandoned")
+
+    def _record(self, outcome: Literal["draw", "X", "O", "abandoned"]):
+        record = GameRecord(
+            finished_at=time.time(),
+            rows=self.rows,
+            columns=self.columns,
+            to_win=self.to_win,
+            difficulty=self.pvp_difficulty if self.pvp else None,
+            player_one=self.author_id,
+            player_two=self._player_two_id,
+            first=self._first_symbol,
+            outcome=outcome,
+            moves=list(self._board.moves),
+            ai_latencies=self._ai_latencies.tolist(),
+        )
+        _move_log.record(record)
+
+        for player_id in (self.author_id, self._player_two_id):
+            if player_id:
+                _last_games.pop(player_id, None)
+                _last_games[player_id] = record
+        while len(_last_games) > _MAX_LAST_GAMES:
+            # dicts keep the insertion order, the first entry is the oldest
+            del _last_games[next(iter(_last_games))]
@@ -0,0 +1,32 @@
+from typing import Literal
+
+import attrs
+
+
+@attrs.define(frozen=True)
+class Difficulty:
+    """How the computer picks its moves"""
+
+    name: str
+    # the minimax search depth. For the monte carlo search it's only the effort the scheduler sees,
+    # the time budget shrinks with it when the bot is overloaded
+    depth: int
+    # how often a random move is played instead of the best one
+    chance_to_fail: float = 0
+    engine: Literal["minimax", "mcts"] = "minimax"
+    # time budget per move of the monte carlo search. This is the strength knob of that engine
+    seconds: float = 0
+
+
+# the keys are the values of the slash command choices
+DIFFICULTIES: dict[int, Difficulty] = {
+    0: Difficulty(name="Very Easy", depth=0),
+    1: Difficulty(name="Easy", depth=1, chance_to_fail=0.2),
+    2: Difficulty(name="Normal", depth=2, chance_to_fail=0.15),
+    3: Difficulty(name="Hard", depth=3, chance_to_fail=0.1),
+    5: Difficulty(name="Very Hard", depth=5),
+    7: Difficulty(name="Impossible", depth=7),
+    10: Difficulty(name="Monte Carlo (Quick)", depth=3, engine="mcts", seconds=0.25),
+    11: Difficulty(name="Monte Carlo", depth=5, engine="mcts", seconds=1),
+    12: Difficulty(name="Monte Carlo (Deep)", depth=7, engine="mcts", seconds=3),
+}
@@ -0,0 +1,304 @@
+import asyncio
+import logging
+import time
+from enum import IntEnum
+from typing import Callable, Optional
+
+import attrs
+from naff import Client, ComponentContext, Message
+from naff.client.errors import NotFound
+
+
+class EditPriority(IntEnum):
+    """Lower values are sent first"""
+
+    GAME_OVER = 0
+    SUBMIT = 1
+    CURSOR = 2
+    ANALYSIS = 3
+
+
+@attrs.define(frozen=True, slots=True)
+class MessageRef:
+    """
+    Just the ids of a message, enough to edit it
+
+    Games live for minutes, so they only keep this instead of the whole naff `Message`
+    """
+
+    client: Client = attrs.field(repr=False)
+    channel_id: int = attrs.field()
+    id: int = attrs.field()
+    guild_id: Optional[int] = attrs.field(default=None)
+
+    @classmethod
+    def from_message(cls, message: Message) -> "MessageRef":
+        return cls(
+            client=message._client,  # noqa
+            channel_id=int(message._channel_id),  # noqa
+            id=int(message.id),
+            guild_id=int(message._guild_id) if message._guild_id else None,  # noqa
+        )
+
+    @property
+    def jump_url(self) -> str:
+        return f"https://discord.com/channels/{self.guild_id or '@me'}/{self.channel_id}/{self.id}"
+
+    async def edit(
+        self,
+        embeds: Optional[dict | list[dict]] = None,
+        components: Optional[list[dict]] = None,
+    ):
+        """Same as `Message.edit`, for the already built payload dicts the games use"""
+
+        payload = {}
+        if embeds is not None:
+            payload["embeds"] = embeds if isinstance(embeds, list) else [embeds]
+        if components is not None:
+            payload["components"] = components
+        await self.client.http.edit_message(payload, self.channel_id, self.id)
+
+
+@attrs.define
+class EditStats:
+    """Counters of the `EditScheduler`, logged every now and then"""
+
+    sent: int = attrs.field(default=0)
+    # answered through the interaction instead of the channel's queue
+    responded: int = attrs.field(default=0)
+    superseded: int = attrs.field(default=0)
+    failed: int = attrs.field(default=0)
+    max_queue_depth: int = attrs.field(default=0)
+    total_latency: float = attrs.field(default=0)
+    max_latency: float = attrs.field(default=0)
+
+    def __str__(self) -> str:
+        average_latency = self.total_latency / self.sent if self.sent else 0
+        return (
+            f"{self.sent} sent, {self.responded} responded, {self.superseded} superseded, {self.failed} failed edits - "
+            f"max queue depth {self.max_queue_depth}, "
+            f"queue latency avg {average_latency * 1000:.1f}ms / max {self.max_latency * 1000:.1f}ms"
+        )
+
+
+@attrs.define
+class _PendingEdit:
+    message: MessageRef
+    payload: dict
+    priority: EditPriority
+    queued_at: float = attrs.field(factory=time.perf_counter)
+    on_not_found: Optional[Callable[[MessageRef], None]] = attrs.field(default=None)
+    # resolved with True once the edit, or a newer one for the same message, was sent
+    futures: list[asyncio.Future] = attrs.field(factory=list)
+
+
+@attrs.define
+class _Bucket:
+    tokens: float
+    updated: float = attrs.field(factory=time.perf_counter)
+    # message id -> the newest edit of that message
+    pending: dict[int, _PendingEdit] = attrs.field(factory=dict)
+    worker: Optional[asyncio.Task] = attrs.field(default=None)
+
+
+@attrs.define
+class EditScheduler:
+    """
+    Sends all game message edits, at most `edits_per_period` per channel and `period`
+
+    Discord rate limits message edits per channel. Instead of firing every edit right away and piling up 429s when
+    many games share a channel, every channel gets a queue:
+    - A newer edit of the same message replaces the queued one, only the latest state is sent
+    - Game endings go before submits, which go before cursor moves
+    Edits caused by a button click are the answer to that interaction instead, see `respond`. Those do not count
+    against the channel's rate limit, so only edits without an interaction, like the computer's moves, are queued
+    """
+
+    edits_per_period: int = attrs.field(default=5)
+    period: float = attrs.field(default=5)
+    report_interval: float = attrs.field(default=300)
+
+    logger: logging.Logger = attrs.field(
+        init=False, default=logging.getLogger("Connect4")
+    )
+    stats: EditStats = attrs.field(init=False, factory=EditStats)
+
+    # channel id -> bucket
+    _buckets: dict[int, _Bucket] = attrs.field(init=False, factory=dict)
+    _last_report: float = attrs.field(init=False, factory=time.perf_counter)
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(len(bucket.pending) for bucket in self._buckets.values())
+
+    async def respond(
+        self,
+        ctx: ComponentContext,
+        message: MessageRef,
+        priority: EditPriority,
+        **payload,
+    ):
+        """
+        Answers the component interaction `ctx` on `message` with `ctx.edit_origin(**payload)`
+
+        A still queued edit of the message is sent along and dropped, it would overwrite this newer state later. If
+        the interaction was already answered, or answering it fails, the edit is queued with `priority` instead
+        """
+
+        if ctx.responded:
+            await self.submit(message, priority, **payload)
+            return
+
+        edit = None
+        if bucket := self._buckets.get(message.channel_id):
+            edit = bucket.pending.pop(message.id, None)
+        if edit:
+            payload = {**edit.payload, **payload}
+            self.stats.superseded += 1
+
+        try:
+            await ctx.edit_origin(**payload)
+        except Exception as error:
+            # most likely the interaction expired, the message still has to show this state
+            self.logger.warning(
+                f"Answering the interaction on message `{message.id}` failed, queueing it: {error}"
+            )
+            await self.submit(
+                message,
+                min(edit.priority, priority) if edit else priority,
+                on_not_found=edit.on_not_found if edit else None,
+                **payload,
+            )
+            if edit:
+                self._buckets[message.channel_id].pending[message.id].futures.extend(
+                    edit.futures
+                )
+            return
+
+        self.stats.responded += 1
+        if edit:
+            for future in edit.futures:
+                if not future.done():
+                    future.set_result(True)
+
+    async def submit(
+        self,
+        message: MessageRef,
+        priority: EditPriority,
+        on_not_found: Optional[Callable[[MessageRef], None]] = None,
+        **payload,
+    ) -> asyncio.Future:
+        """
+        Queues `message.edit(**payload)`. `on_not_found` is called with `message` if it was deleted in the meantime
+
+        Returns a future that is resolved once the message shows this state. There is no need to await it
+        """
+
+        bucket = self._buckets.get(message.channel_id)
+        if not bucket:
+            bucket = self._buckets[message.channel_id] = _Bucket(
+                tokens=self.edits_per_period
+            )
+
+        future = asyncio.get_running_loop().create_future()
+        if old := bucket.pending.get(message.id):
+            # keep what the old edit changed, unless the new one changes it again
+            old.payload = {**old.payload, **payload}
+            old.priority = min(old.priority, priority)
+            old.futures.append(future)
+            old.on_not_found = on_not_found or old.on_not_found
+            self.stats.superseded += 1
+        else:
+            bucket.pending[message.id] = _PendingEdit(
+                message=message,
+                payload=payload,
+                priority=priority,
+                futures=[future],
+                on_not_found=on_not_found,
+            )
+            self.stats.max_queue_depth = max(
+                self.stats.max_queue_depth, self.queue_depth
+            )
+
+        if not bucket.worker:
+            bucket.worker = asyncio.create_task(self._drain(bucket))
+        return future
+
+    async def _drain(self, bucket: _Bucket):
+        """Sends the edits of one channel, one after another and within the rate limit"""
+
+        try:
+            await self._drain_pending(bucket)
+        finally:
+            bucket.worker = None
+        self._report()
+
+    async def _drain_pending(self, bucket: _Bucket):
+        while bucket.pending:
+            await self._take_token(bucket)
+            if not bucket.pending:
+                # answered through an interaction while waiting for the token, which is still unused
+                bucket.tokens += 1
+                break
+
+            # the most important and then the oldest edit
+            message_id, edit = min(
+                bucket.pending.items(),
+                key=lambda item: (item[1].priority, item[1].queued_at),
+            )
+            del bucket.pending[message_id]
+
+            latency = time.perf_counter() - edit.queued_at
+            self.stats.total_latency += latency
+            self.stats.max_latency = max(self.stats.max_latency, latency)
+            try:
+                await edit.message.edit(**edit.payload)
+            except NotFound:
+                self.stats.failed += 1
+                sent = False
+                if edit.on_not_found:
+                    edit.on_not_found(edit.message)
+                else:
+                    self.logger.warning(
+                        f"Editing message `{message_id}` failed, it was deleted"
+                    )
+            except Exception as error:
+                self.stats.failed += 1
+                self.logger.error(f"Editing message `{message_id}` failed: {error}")
+                sent = False
+            else:
+                self.stats.sent += 1
+                sent = True
+
+            for future in edit.futures:
+                if not future.done():
+                    future.set_result(sent)
+
+    async def _take_token(self, bucket: _Bucket):
+        rate = self.edits_per_period / self.period
+        now = time.perf_counter()
+        bucket.tokens = min(
+            self.edits_per_period, bucket.tokens + (now - bucket.updated) * rate
+        )
+        bucket.updated = now
+
+        if bucket.tokens < 1:
+            # newer edits can replace the queued ones while we wait
+            await asyncio.sleep((1 - bucket.tokens) / rate)
+            bucket.tokens = 1
+            bucket.updated = time.perf_counter()
+        bucket.tokens -= 1
+
+    def _report(self):
+        if time.perf_counter() - self._last_report < self.report_interval:
+            return
+        self._last_report = time.perf_counter()
+
+        # idle channels have refilled their tokens long ago
+        for channel_id, bucket in list(self._buckets.items()):
+            if not bucket.worker and not bucket.pending:
+                del self._buckets[channel_id]
+
+        self.logger.info(
+            f"Edit scheduler: {self.stats} - currently {self.queue_depth} waiting"
+        )
@@ -0,0 +1,535 @@
+import functools
+from typing import Literal, Optional
+
+import attrs
+
+
+@attrs.define(frozen=True)
+class Variant:
+    """A board size and how many pieces in a row are needed to win"""
+
+    name: str
+    rows: int
+    columns: int
+    to_win: int
+
+
+# the variants that can be picked in the slash commands
+VARIANTS: dict[str, Variant] = {
+    "6x7": Variant(name="Classic", rows=6, columns=7, to_win=4),
+    "8x9": Variant(name="Large", rows=8, columns=9, to_win=4),
+    "10x12": Variant(name="Huge", rows=10, columns=12, to_win=5),
+}
+
+
+@attrs.define(frozen=True)
+class Geometry:
+    """
+    Precomputed bitboard masks for one board size
+
+    Every column uses `rows + 1` bits, the top one is always empty. That sentinel bit makes sure that shifting a
+    bitboard never wraps a line of pieces from one column into the next one, so all four directions can be checked
+    with plain shifts
+    """
+
+    rows: int
+    columns: int
+    to_win: int
+
+    height: int
+    # vertical, horizontal, diagonal /, diagonal \
+    shifts: tuple[int, int, int, int]
+    # per direction, the shifts that reduce a bitboard to the start bits of all lines with `to_win` pieces
+    run_shifts: tuple[tuple[int, ...], ...]
+    bottom_mask: int
+    board_mask: int
+    column_masks: tuple[int, ...]
+    bottom_masks: tuple[int, ...]
+    top_masks: tuple[int, ...]
+    # columns sorted from the center outwards, those are usually the best moves
+    move_order: tuple[int, ...]
+
+
+@functools.lru_cache(maxsize=None)
+def get_geometry(rows: int, columns: int, to_win: int) -> Geometry:
+    """Returns the (cached) masks for the given board size"""
+
+    assert rows >= 1 and columns >= 1, "The board needs at least one row and column"
+    assert (
+        1 < to_win <= max(rows, columns)
+    ), "The board is too small for that many pieces in a row"
+
+    height = rows + 1
+    column_masks = tuple(((1 << rows) - 1) << (col * height) for col in range(columns))
+    bottom_masks = tuple(1 << (col * height) for col in range(columns))
+    top_masks = tuple(1 << (rows - 1 + col * height) for col in range(columns))
+
+    # double the length of the found lines until we are as close to `to_win` as possible, then add the rest
+    shifts = (1, height, height + 1, height - 1)
+    run_shifts = []
+    for shift in shifts:
+        steps = []
+        length = 1
+        while length * 2 <= to_win:
+            steps.append(length * shift)
+            length *= 2
+        if length < to_win:
+            steps.append((to_win - length) * shift)
+        run_shifts.append(tuple(steps))
+
+    center = (columns - 1) / 2
+    move_order = tuple(sorted(range(columns), key=lambda col: (abs(col - center), col)))
+
+    return Geometry(
+        rows=rows,
+        columns=columns,
+        to_win=to_win,
+        height=height,
+        shifts=shifts,
+        run_shifts=tuple(run_shifts),
+        bottom_mask=sum(bottom_masks),
+        board_mask=sum(column_masks),
+        column_masks=column_masks,
+        bottom_masks=bottom_masks,
+        top_masks=top_masks,
+        move_order=move_order,
+    )
+
+
+def get_lines(bits: int, geometry: Geometry) -> list[tuple[int, int]]:
+    """Returns (start bits, shift) for every direction in which `bits` contains `to_win` pieces in a row"""
+
+    lines = []
+    for shift, steps in zip(geometry.shifts, geometry.run_shifts):
+        runs = bits
+        for step in steps:
+            runs &= runs >> step
+        if runs:
+            lines.append((runs, shift))
+    return lines
+
+
+def has_won(bits: int, geometry: Geometry) -> bool:
+    """Checks if `bits` contains `to_win` pieces in a row"""
+
+    for steps in geometry.run_shifts:
+        runs = bits
+        for step in steps:
+            runs &= runs >> step
+        if runs:
+            return True
+    return False
+
+
+@attrs.define
+class Board:
+    """A connect 4 board stored as one bitboard per player"""
+
+    rows: int = attrs.field(default=6)
+    columns: int = attrs.field(default=7)
+    to_win: int = attrs.field(default=4)
+
+    geometry: Geometry = attrs.field(init=False)
+    pieces: dict[Literal["O", "X"], int] = attrs.field(init=False)
+    mask: int = attrs.field(init=False, default=0)
+    # one byte per move
+    moves: bytearray = attrs.field(init=False, factory=bytearray)
+
+    def __attrs_post_init__(self):
+        self.geometry = get_geometry(self.rows, self.columns, self.to_win)
+        self.pieces = {"O": 0, "X": 0}
+
+    @classmethod
+    def from_variant(cls, variant: Variant) -> "Board":
+        return cls(rows=variant.rows, columns=variant.columns, to_win=variant.to_win)
+
+    def copy(self) -> "Board":
+        board = Board(rows=self.rows, columns=self.columns, to_win=self.to_win)
+        board.pieces = self.pieces.copy()
+        board.mask = self.mask
+        board.moves = self.moves.copy()
+        return board
+
+    def can_play(self, position: int) -> bool:
+        return not self.mask & self.geometry.top_masks[position]
+
+    def valid_moves(self) -> list[int]:
+        return [position for position in range(self.columns) if self.can_play(position)]
+
+    def is_full(self) -> bool:
+        return self.mask == self.geometry.board_mask
+
+    def play(self, symbol: Literal["O", "X"], position: int) -> bool:
+        """Drops a piece in the column. Returns False if the column is already full"""
+
+        if not self.can_play(position):
+            return False
+
+        # adding the bottom bit to the column carries over into the first free cell
+        new_mask = self.mask | (self.mask + self.geometry.bottom_masks[position])
+        self.pieces[symbol] |= new_mask ^ self.mask
+        self.mask = new_mask
+        self.moves.append(position)
+        return True
+
+    def has_won(self, symbol: Literal["O", "X"]) -> bool:
+        return has_won(self.pieces[symbol], self.geometry)
+
+    def get_winner_symbol(self) -> Optional[Literal["O", "X"]]:
+        if self.has_won("O"):
+            return "O"
+        elif self.has_won("X"):
+            return "X"
+        return None
+
+    def winning_cells(
+        self, symbol: Literal["O", "X"]
+    ) -> Optional[list[tuple[int, int]]]:
+        """Returns the (row, column) coords of one winning line, with row 0 being the top row"""
+
+        lines = get_lines(self.pieces[symbol], self.geometry)
+        if not lines:
+            return None
+
+        runs, shift = lines[0]
+        start = (runs & -runs).bit_length() - 1
+        return [self._bit_to_coords(start + z * shift) for z in range(self.to_win)]
+
+    def cell(self, row: int, column: int) -> Literal["_", "O", "X"]:
+        """Returns the symbol at (row, column), with row 0 being the top row"""
+
+        bit = 1 << (column * self.geometry.height + self.rows - 1 - row)
+        if self.pieces["X"] & bit:
+            return "X"
+        elif self.pieces["O"] & bit:
+            return "O"
+        return "_"
+
+    def _bit_to_coords(self, index: int) -> tuple[int, int]:
+        column, height = divmod(index, self.geometry.height)
+        return self.rows - 1 - height, column
+
+
+def mirror(bits: int, geometry: Geometry) -> int:
+    """Flips a bitboard horizontally, so the first column becomes the last one"""
+
+    column_mask = geometry.column_masks[0]
+    mirrored = 0
+    for column in range(geometry.columns):
+        mirrored |= ((bits >> (column * geometry.height)) & column_mask) << (
+            (geometry.columns - 1 - column) * geometry.height
+        )
+    return mirrored
+
+
+def position_key(current: int, mask: int) -> int:
+    """
+    Unique key for the position with `current` being the pieces of the player to move
+
+    Per column, `mask` is a run of set bits starting at the bottom, so adding the pieces never carries over into
+    the next column and every position ends up with its own number
+    """
+
+    return current + mask
+
+
+def canonical_key(current: int, mask: int, geometry: Geometry) -> tuple[int, bool]:
+    """
+    Returns the key shared by a position and its mirror image, and whether the position had to be mirrored for it
+
+    A position and its mirror image have the same value, the moves just have to be mirrored too
+    """
+
+    key = position_key(current, mask)
+    mirrored_key = position_key(mirror(current, geometry), mirror(mask, geometry))
+    if mirrored_key < key:
+        return mirrored_key, True
+    return key, False
+
+
+def search_key(
+    board: Board, symbol: Literal["O", "X"], depth: int
+) -> tuple[tuple[int, int, int, int, int], bool]:
+    """
+    Returns the key under which the search result for `symbol` to move can be stored, and whether the stored best
+    move has to be mirrored for this board
+    """
+
+    key, mirrored = canonical_key(board.pieces[symbol], board.mask, board.geometry)
+    return (board.rows, board.columns, board.to_win, depth, key), mirrored
+
+
+def mirror_moves(moves: int, columns: int, mirrored: bool = True) -> int:
+    """Maps a bitmask of columns between the canonical and the real orientation of the board"""
+
+    if not mirrored:
+        return moves
+    return sum(
+        1 << (columns - 1 - column) for column in range(columns) if moves >> column & 1
+    )
+
+
+def leftmost_move(moves: int) -> Optional[int]:
+    """The left most column in a bitmask of columns, None if it is empty"""
+
+    return (moves & -moves).bit_length() - 1 if moves else None
+
+
+# flags for the transposition table entries, scores are only exact if they were inside the search window
+EXACT, LOWER_BOUND, UPPER_BOUND = 0, 1, 2
+
+
+@attrs.define
+class SearchStats:
+    """Counts the positions visited by `search`"""
+
+    nodes: int = attrs.field(default=0)
+
+
+def search(
+    board: Board,
+    symbol: Literal["O", "X"],
+    depth: int,
+    table: Optional[dict[tuple[int, int], tuple[int, int]]] = None,
+    stats: Optional[SearchStats] = None,
+) -> tuple[Optional[int], int]:
+    """
+    Depth limited alpha-beta search for `symbol`
+
+    Returns the best move and its score, 1 if `symbol` can force a win, -1 if the opponent can and 0 otherwise.
+    Of multiple equally good moves, the left most one is picked
+
+    Searched positions are stored in `table` by their canonical key, so mirrored positions are only searched once.
+    Pass the same table to multiple searches on the same board size to share the results between them
+    """
+
+    best_moves, score = _search_root(
+        board=board,
+        symbol=symbol,
+        depth=depth,
+        table=table,
+        stats=stats,
+        both_ends=False,
+    )
+    return leftmost_move(best_moves), score
+
+
+def search_both_ends(
+    board: Board,
+    symbol: Literal["O", "X"],
+    depth: int,
+    table: Optional[dict[tuple[int, int], tuple[int, int]]] = None,
+    stats: Optional[SearchStats] = None,
+) -> tuple[int, int]:
+    """
+    Same as `search`, but returns the left most and the right most of the equally good moves as a bitmask of columns
+
+    Results that are stored by their canonical key need this: the right most move of a position is the left most
+    one of its mirror image, which is the move `search` would pick for that
+    """
+
+    return _search_root(
+        board=board,
+        symbol=symbol,
+        depth=depth,
+        table=table,
+        stats=stats,
+        both_ends=True,
+    )
+
+
+def _search_root(
+    board: Board,
+    symbol: Literal["O", "X"],
+    depth: int,
+    table: Optional[dict[tuple[int, int], tuple[int, int]]],
+    stats: Optional[SearchStats],
+    both_ends: bool,
+) -> tuple[int, int]:
+    """Returns the left most best move, and the right most one too if `both_ends`, as a bitmask and their score"""
+
+    geometry = board.geometry
+    if winner := board.get_winner_symbol():
+        return 0, 1 if winner == symbol else -1
+    if depth == 0 or board.is_full():
+        return 0, 0
+
+    if table is None:
+        table = {}
+    if stats is None:
+        stats = SearchStats()
+
+    current = board.pieces[symbol]
+    mask = board.mask
+    mirrored_current = mirror(current, geometry)
+    mirrored_mask = mirror(mask, geometry)
+    symmetric = current == mirrored_current and mask == mirrored_mask
+
+    # the root keeps the left to right order, so ties are always resolved the same way
+    best_moves, best_score = 0, -2
+    alpha, beta = -2, 2
+    for position in range(geometry.columns):
+        if mask & geometry.top_masks[position]:
+            continue
+        # the right half of a symmetric position is the same as the left one
+        if symmetric and position > geometry.columns - 1 - position:
+            break
+
+        score = _play(
+            current=current,
+            mask=mask,
+            mirrored_current=mirrored_current,
+            mirrored_mask=mirrored_mask,
+            position=position,
+            depth=depth,
+            alpha=alpha,
+            beta=beta,
+            geometry=geometry,
+            table=table,
+            stats=stats,
+        )
+        if score > best_score:
+            best_moves, best_score = 1 << position, score
+            # nothing beats a win
+            if best_score == 1:
+                break
+        alpha = max(alpha, best_score)
+
+    if not both_ends or not best_moves:
+        return best_moves, best_score
+    if symmetric:
+        return best_moves | mirror_moves(best_moves, geometry.columns), best_score
+
+    # the score is exact now, so from the right, a null window only has to tell if a move reaches it
+    leftmost = leftmost_move(best_moves)
+    for position in range(geometry.columns - 1, leftmost, -1):
+        if mask & geometry.top_masks[position]:
+            continue
+        score = _play(
+            current=current,
+            mask=mask,
+            mirrored_current=mirrored_current,
+            mirrored_mask=mirrored_mask,
+            position=position,
+            depth=depth,
+            alpha=best_score - 1,
+            beta=best_score,
+            geometry=geometry,
+            table=table,
+            stats=stats,
+        )
+        if score >= best_score:
+            return best_moves | 1 << position, best_score
+    return best_moves, best_score
+
+
+def _play(
+    current: int,
+    mask: int,
+    mirrored_current: int,
+    mirrored_mask: int,
+    position: int,
+    depth: int,
+    alpha: int,
+    beta: int,
+    geometry: Geometry,
+    table: dict[tuple[int, int], tuple[int, int]],
+    stats: SearchStats,
+) -> int:
+    """Plays `position` for the player owning `current` and returns the score from their point of view"""
+
+    stats.nodes += 1
+    new_mask = mask | (mask + geometry.bottom_masks[position])
+    current |= new_mask ^ mask
+    if has_won(current, geometry):
+        return 1
+    if depth == 1 or new_mask == geometry.board_mask:
+        return 0
+
+    # the mirrored board gets the same move in the mirrored column
+    mirrored_position = geometry.columns - 1 - position
+    new_mirrored_mask = mirrored_mask | (
+        mirrored_mask + geometry.bottom_masks[mirrored_position]
+    )
+    mirrored_current |= new_mirrored_mask ^ mirrored_mask
+
+    # from here on it's the opponent's turn
+    return -_negamax(
+        current=current ^ new_mask,
+        mask=new_mask,
+        mirrored_current=mirrored_current ^ new_mirrored_mask,
+        mirrored_mask=new_mirrored_mask,
+        depth=depth - 1,
+        alpha=-beta,
+        beta=-alpha,
+        geometry=geometry,
+        table=table,
+        stats=stats,
+    )
+
+
+def _negamax(
+    current: int,
+    mask: int,
+    mirrored_current: int,
+    mirrored_mask: int,
+    depth: int,
+    alpha: int,
+    beta: int,
+    geometry: Geometry,
+    table: dict[tuple[int, int], tuple[int, int]],
+    stats: SearchStats,
+) -> int:
+    """Returns the score of the position from the point of view of the player owning `current`, who is to move"""
+
+    key = current + mask
+    mirrored_key = mirrored_current + mirrored_mask
+    table_key = (min(key, mirrored_key), depth)
+
+    # the position, or its mirror image, was already searched
+    if entry := table.get(table_key):
+        flag, score = entry
+        if (
+            flag == EXACT
+            or (flag == LOWER_BOUND and score >= beta)
+            or (flag == UPPER_BOUND and score <= alpha)
+        ):
+            return score
+
+    symmetric = key == mirrored_key
+    start_alpha = alpha
+    best_score = -2
+    for position in geometry.move_order:
+        if mask & geometry.top_masks[position]:
+            continue
+        # the right half of a symmetric position is the same as the left one
+        if symmetric and position > geometry.columns - 1 - position:
+            continue
+
+        score = _play(
+            current=current,
+            mask=mask,
+            mirrored_current=mirrored_current,
+            mirrored_mask=mirrored_mask,
+            position=position,
+            depth=depth,
+            alpha=alpha,
+            beta=beta,
+            geometry=geometry,
+            table=table,
+            stats=stats,
+        )
+
+        if score > best_score:
+            best_score = score
+            if best_score >= beta or best_score == 1:
+                break
+            alpha = max(alpha, best_score)
+
+    if best_score <= start_alpha:
+        table[table_key] = (UPPER_BOUND, best_score)
+    elif best_score >= beta:
+        table[table_key] = (LOWER_BOUND, best_score)
+    else:
+        table[table_key] = (EXACT, best_score)
+    return best_score
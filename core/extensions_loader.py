@@ -1,5 +1,6 @@
-import os
+import pkgutil
 
+import extensions
 from core.base import CustomClient
 
 
@@ -8,16 +9,15 @@ def load_extensions(bot: CustomClient):
 
     bot.logger.info("Loading Extensions...")
 
-    # go through all folders in the directory and load the extensions from all files
-    # Note: files must end in .py
-    for root, dirs, files in os.walk("extensions"):
-        for file in files:
-            if file.endswith(".py") and not file.startswith("__init__"):
-                file = file.removesuffix(".py")
-                path = os.path.join(root, file)
-                python_import_path = path.replace("/", ".").replace("\\", ".")
+    # go through all modules in the package and its sub packages and load the extensions from them
+    # Note: pkgutil only looks at the package itself, not at every file below the working directory
+    for module in pkgutil.walk_packages(
+        extensions.__path__, prefix=f"{extensions.__name__}."
+    ):
+        if not module.ispkg:
+            # load the extension
+            bot.load_extension(module.name)
 
-                # load the extension
-                bot.load_extension(python_import_path)
-
-    bot.logger.info(f"< {len(bot.interactions.get(0, []))} > Global Interactions Loaded")
+    bot.logger.info(
+        f"< {len(bot.interactions.get(0, []))} > Global Interactions Loaded"
+    )
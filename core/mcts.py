@@ -0,0 +1,274 @@
+import math
+import threading
+import time
+from typing import Literal, Optional
+
+import attrs
+import numpy as np
+
+from core.engine import Board, Geometry, has_won
+
+# vertical, horizontal, diagonal \, diagonal /
+_DIRECTIONS = ((1, 0), (0, 1), (1, 1), (1, -1))
+
+
+def to_cells(
+    current: int, mask: int, geometry: Geometry
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Converts bitboards into a (rows, columns) array, with 1 for the pieces of the player to move and -1 for the
+    other ones, plus the number of pieces in every column. Row 0 is the top row
+    """
+
+    cells = np.zeros((geometry.rows, geometry.columns), dtype=np.int8)
+    heights = np.zeros(geometry.columns, dtype=np.int64)
+    for column in range(geometry.columns):
+        for height in range(geometry.rows):
+            bit = 1 << (column * geometry.height + height)
+            if not mask & bit:
+                break
+            cells[geometry.rows - 1 - height, column] = 1 if current & bit else -1
+            heights[column] += 1
+    return cells, heights
+
+
+def rollouts(
+    cells: np.ndarray,
+    heights: np.ndarray,
+    to_win: int,
+    count: int,
+    rng: np.random.Generator,
+) -> np.ndarray:
+    """
+    Plays `count` random games from the same position at once
+
+    Returns 1 for every game the player to move won, -1 for every lost game and 0 for draws
+    """
+
+    rows, columns = cells.shape
+
+    # a border of empty cells around the board, so the line checks never leave the array
+    pad = to_win - 1
+    boards = np.zeros((count, rows + 2 * pad, columns + 2 * pad), dtype=np.int8)
+    boards[:, pad : pad + rows, pad : pad + columns] = cells
+    heights = np.tile(heights, (count, 1))
+    offsets = np.arange(1, to_win)
+
+    results = np.zeros(count, dtype=np.int8)
+    active = np.arange(count)
+    player = 1
+    for _ in range(rows * columns - int(heights[0].sum())):
+        # every game picks a random column that is not full yet
+        noise = rng.random((active.size, columns))
+        noise[heights[active] >= rows] = -1
+        moves = noise.argmax(axis=1)
+
+        row = pad + rows - 1 - heights[active, moves]
+        column = pad + moves
+        boards[active, row, column] = player
+        heights[active, moves] += 1
+
+        # count the pieces in a row through the new piece, in both ways of every direction
+        won = np.zeros(active.size, dtype=bool)
+        for dr, dc in _DIRECTIONS:
+            in_a_row = np.ones(active.size, dtype=np.int64)
+            for sign in (1, -1):
+                same = (
+                    boards[
+                        active[:, None],
+                        row[:, None] + sign * dr * offsets,
+                        column[:, None] + sign * dc * offsets,
+                    ]
+                    == player
+                )
+                in_a_row += np.cumprod(same, axis=1).sum(axis=1)
+            won |= in_a_row >= to_win
+
+        results[active[won]] = player
+        active = active[~won]
+        if not active.size:
+            break
+        player = -player
+
+    return results
+
+
+@attrs.define(eq=False)
+class _Node:
+    # the pieces of the player to move in this position
+    current: int
+    mask: int
+    move: Optional[int]
+    parent: Optional["_Node"]
+    # if the game is over, the reward for the player who moved into this position
+    terminal: Optional[float]
+    untried: list[int]
+
+    children: list["_Node"] = attrs.field(factory=list)
+    visits: int = attrs.field(default=0)
+    # summed rewards for the player who moved into this position, 1 for a win and 0.5 for a draw
+    reward: float = attrs.field(default=0)
+
+
+@attrs.define
+class MonteCarloTreeSearch:
+    """
+    Monte Carlo tree search, which can be stopped at any time and still return a move
+
+    Every iteration walks down the tree with UCT, expands one new position and plays `batch_size` random games from
+    it at once with NumPy. The longer it runs, the better the moves get, so the time budget is the strength knob
+    """
+
+    board: Board = attrs.field()
+    symbol: Literal["O", "X"] = attrs.field()
+    batch_size: int = attrs.field(default=64)
+    exploration: float = attrs.field(default=1.4)
+    seed: Optional[int] = attrs.field(default=None)
+
+    playouts: int = attrs.field(init=False, default=0)
+
+    _root: _Node = attrs.field(init=False)
+    _rng: np.random.Generator = attrs.field(init=False)
+    _stop: threading.Event = attrs.field(init=False, factory=threading.Event)
+
+    def __attrs_post_init__(self):
+        self._rng = np.random.default_rng(self.seed)
+        self._root = self._new_node(
+            current=self.board.pieces[self.symbol],
+            mask=self.board.mask,
+            move=None,
+            parent=None,
+            terminal=None,
+        )
+
+    def stop(self):
+        """Makes `run()` return after the current iteration. Safe to call from another thread"""
+
+        self._stop.set()
+
+    def run(
+        self, seconds: Optional[float] = None, iterations: Optional[int] = None
+    ) -> Optional[int]:
+        """Searches until the time is up, the iterations are done or `stop()` is called. Returns the best move"""
+
+        assert (
+            seconds is not None or iterations is not None
+        ), "Need to input either seconds or iterations"
+
+        deadline = time.perf_counter() + seconds if seconds is not None else math.inf
+        done = 0
+        while (
+            not self._stop.is_set()
+            and time.perf_counter() < deadline
+            and (iterations is None or done < iterations)
+        ):
+            self._iterate()
+            done += 1
+        return self.best_move()
+
+    def best_move(self) -> Optional[int]:
+        """The most visited move so far, or the first valid one if nothing was searched yet"""
+
+        if not self._root.children:
+            return self._root.untried[0] if self._root.untried else None
+        return max(self._root.children, key=lambda child: child.visits).move
+
+    def _iterate(self):
+        # selection
+        node = self._root
+        while not node.untried and node.children and node.terminal is None:
+            node = self._select(node)
+
+        # expansion
+        if node.untried and node.terminal is None:
+            node = self._expand(node)
+
+        # simulation
+        if node.terminal is not None:
+            visits, reward = self.batch_size, node.terminal * self.batch_size
+        else:
+            cells, heights = to_cells(node.current, node.mask, self.board.geometry)
+            results = rollouts(
+                cells, heights, self.board.to_win, self.batch_size, self._rng
+            )
+            # the results are for the player to move, the node stores the rewards of the player who moved into it
+            visits = self.batch_size
+            reward = float((results == -1).sum()) + 0.5 * float((results == 0).sum())
+        self.playouts += visits
+
+        # backpropagation, every level up the tree is the other player's point of view
+        while node is not None:
+            node.visits += visits
+            node.reward += reward
+            reward = visits - reward
+            node = node.parent
+
+    def _select(self, node: _Node) -> _Node:
+        log_visits = math.log(node.visits)
+        return max(
+            node.children,
+            key=lambda child: child.reward / child.visits
+            + self.exploration * math.sqrt(log_visits / child.visits),
+        )
+
+    def _expand(self, node: _Node) -> _Node:
+        geometry = self.board.geometry
+        move = node.untried.pop()
+
+        new_mask = node.mask | (node.mask + geometry.bottom_masks[move])
+        moved = node.current | (new_mask ^ node.mask)
+        if has_won(moved, geometry):
+            terminal = 1.0
+        elif new_mask == geometry.board_mask:
+            terminal = 0.5
+        else:
+            terminal = None
+
+        child = self._new_node(
+            current=moved ^ new_mask,
+            mask=new_mask,
+            move=move,
+            parent=node,
+            terminal=terminal,
+        )
+        node.children.append(child)
+        return child
+
+    def _new_node(
+        self,
+        current: int,
+        mask: int,
+        move: Optional[int],
+        parent: Optional[_Node],
+        terminal: Optional[float],
+    ) -> _Node:
+        geometry = self.board.geometry
+        untried = []
+        if terminal is None:
+            # popped from the back, so the center columns are expanded first
+            untried = [
+                position
+                for position in reversed(geometry.move_order)
+                if not mask & geometry.top_masks[position]
+            ]
+        return _Node(
+            current=current,
+            mask=mask,
+            move=move,
+            parent=parent,
+            terminal=terminal,
+            untried=untried,
+        )
+
+
+def mcts(
+    board: Board,
+    symbol: Literal["O", "X"],
+    seconds: float,
+    batch_size: int = 64,
+) -> Optional[int]:
+    """Returns the best move for `symbol` that the Monte Carlo tree search finds within `seconds`"""
+
+    return MonteCarloTreeSearch(board=board, symbol=symbol, batch_size=batch_size).run(
+        seconds=seconds
+    )
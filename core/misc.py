@@ -2,6 +2,8 @@ from typing import Optional
 
 from naff import Colour, Embed, Guild, Member, User
 
+EMBED_COLOUR = Colour.from_hex("#71b093")
+
 
 def embed_message(
     title: Optional[str] = None,
@@ -17,14 +19,20 @@ def embed_message(
     ), "Need to input either title or description or footer"
 
     if not member or guild:
-        embed = Embed(title=title, description=description, color=Colour.from_hex("#71b093"))
+        embed = Embed(title=title, description=description, color=EMBED_COLOUR)
     else:
-        embed = Embed(description=description, color=Colour.from_hex("#71b093"))
+        embed = Embed(description=description, color=EMBED_COLOUR)
         if member:
             if isinstance(member, Member):
-                embed.set_author(name=f"{member.display_name}'s {title}", icon_url=member.display_avatar.url)
+                embed.set_author(
+                    name=f"{member.display_name}'s {title}",
+                    icon_url=member.display_avatar.url,
+                )
             else:
-                embed.set_author(name=f"{member.username}#{member.discriminator}'s {title}", icon_url=member.avatar.url)
+                embed.set_author(
+                    name=f"{member.username}#{member.discriminator}'s {title}",
+                    icon_url=member.avatar.url,
+                )
         elif guild:
             embed.set_author(name=f"{guild.name}'s {title}", icon_url=guild.icon.url)
 
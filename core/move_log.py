@@ -0,0 +1,295 @@
+"""
+Append-only binary log of finished games
+
+Every log file starts with `MAGIC`, followed by one record per game. A record is a `_HEADER`, the columns of the
+moves packed two per byte and the computer's thinking time of each of its moves in milliseconds.
+
+Export the logs as JSON lines with `python -m core.move_log ./logs/games > games.jsonl`
+"""
+
+import argparse
+import atexit
+import logging
+import os
+import queue
+import struct
+import sys
+import threading
+import time
+from typing import BinaryIO, Iterable, Iterator, Literal, Optional
+
+import attrs
+import orjson
+
+MAGIC = b"C4MOVES1"
+
+# record size (without these 2 bytes), finished at, rows, columns, to win, difficulty (-1 for versus games),
+# first player, outcome, player one, player two (0 for the computer), number of moves, number of computer moves
+_HEADER = struct.Struct("<HdBBBbBBQQHH")
+
+FIRST_PLAYERS: tuple[Literal["X", "O"], ...] = ("X", "O")
+OUTCOMES: tuple[Literal["draw", "X", "O", "abandoned"], ...] = (
+    "draw",
+    "X",
+    "O",
+    "abandoned",
+)
+
+
+@attrs.define(slots=True)
+class GameRecord:
+    """One finished game. X is player one, O is player two or the computer"""
+
+    finished_at: float = attrs.field()
+    rows: int = attrs.field()
+    columns: int = attrs.field()
+    to_win: int = attrs.field()
+    # None for versus games
+    difficulty: Optional[int] = attrs.field()
+    player_one: int = attrs.field()
+    # None for the computer, or if nobody joined
+    player_two: Optional[int] = attrs.field()
+    first: Literal["X", "O"] = attrs.field()
+    outcome: Literal["draw", "X", "O", "abandoned"] = attrs.field()
+    moves: list[int] = attrs.field(factory=list)
+    # seconds the computer needed for each of its moves
+    ai_latencies: list[float] = attrs.field(factory=list)
+
+    def to_bytes(self) -> bytes:
+        # columns always fit in half a byte, two moves share one byte
+        moves = bytearray((len(self.moves) + 1) // 2)
+        for i, column in enumerate(self.moves):
+            moves[i // 2] |= column << (4 * (i % 2))
+        latencies = struct.pack(
+            f"<{len(self.ai_latencies)}H",
+            *(min(round(latency * 1000), 0xFFFF) for latency in self.ai_latencies),
+        )
+
+        header = _HEADER.pack(
+            _HEADER.size - 2 + len(moves) + len(latencies),
+            self.finished_at,
+            self.rows,
+            self.columns,
+            self.to_win,
+            -1 if self.difficulty is None else self.difficulty,
+            FIRST_PLAYERS.index(self.first),
+            OUTCOMES.index(self.outcome),
+            self.player_one,
+            self.player_two or 0,
+            len(self.moves),
+            len(self.ai_latencies),
+        )
+        return header + moves + latencies
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "GameRecord":
+        """Reads a record from `data`, including its 2 size bytes"""
+
+        (
+            _,
+            finished_at,
+            rows,
+            columns,
+            to_win,
+            difficulty,
+            first,
+            outcome,
+            player_one,
+            player_two,
+            move_count,
+            latency_count,
+        ) = _HEADER.unpack_from(data)
+
+        offset = _HEADER.size
+        packed = data[offset : offset + (move_count + 1) // 2]
+        moves = [(packed[i // 2] >> (4 * (i % 2))) & 0xF for i in range(move_count)]
+        offset += len(packed)
+        latencies = struct.unpack_from(f"<{latency_count}H", data, offset)
+
+        return cls(
+            finished_at=finished_at,
+            rows=rows,
+            columns=columns,
+            to_win=to_win,
+            difficulty=None if difficulty == -1 else difficulty,
+            player_one=player_one,
+            player_two=player_two or None,
+            first=FIRST_PLAYERS[first],
+            outcome=OUTCOMES[outcome],
+            moves=moves,
+            ai_latencies=[latency / 1000 for latency in latencies],
+        )
+
+
+@attrs.define
+class MoveLog:
+    """
+    Writes `GameRecord`s to rotating log files in `directory`
+
+    `record()` only queues the record. A background thread writes the queued records in batches, once `batch_size`
+    are waiting or `flush_interval` seconds passed. A new file is started before a record would make the current one
+    larger than `max_file_bytes`, and only the newest `max_files` files this process wrote are kept. The files of
+    other processes, which could still be writing to them, are left alone
+    """
+
+    directory: str = attrs.field(default="./logs/games")
+    max_file_bytes: int = attrs.field(default=64 * 1024 * 1024)
+    max_files: int = attrs.field(default=32)
+    batch_size: int = attrs.field(default=256)
+    flush_interval: float = attrs.field(default=5)
+
+    logger: logging.Logger = attrs.field(
+        init=False, default=logging.getLogger("Connect4")
+    )
+
+    # None tells the thread to stop
+    _queue: queue.SimpleQueue[Optional[GameRecord]] = attrs.field(
+        init=False, factory=queue.SimpleQueue
+    )
+    _thread: Optional[threading.Thread] = attrs.field(init=False, default=None)
+    _file: Optional[BinaryIO] = attrs.field(init=False, default=None)
+    _file_bytes: int = attrs.field(init=False, default=0)
+    _file_count: int = attrs.field(init=False, default=0)
+    # the paths of the files this process wrote, oldest first
+    _paths: list[str] = attrs.field(init=False, factory=list)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self):
+        """Starts the background thread. Until this is called, `record()` does nothing"""
+
+        if self._thread:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="MoveLog", daemon=True)
+        self._thread.start()
+
+        # write what is still queued when the bot shuts down
+        atexit.register(self.close)
+        self.logger.info(f"Logging finished games to `{self.directory}`")
+
+    def record(self, record: GameRecord):
+        if self.running:
+            self._queue.put(record)
+
+    def close(self):
+        """Writes the queued records and stops the background thread"""
+
+        if not self._thread:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            # wait for the first record, then collect more until the batch is full or it is time to write
+            batch = []
+            record = self._queue.get()
+            deadline = time.monotonic() + self.flush_interval
+            while record is not None:
+                batch.append(record)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    record = self._queue.get(
+                        timeout=max(0.0, deadline - time.monotonic())
+                    )
+                except queue.Empty:
+                    break
+            stopping = record is None
+
+            if batch:
+                try:
+                    for record in batch:
+                        self._write(record.to_bytes())
+                    self._file.flush()
+                except Exception as error:
+                    self.logger.error(
+                        f"Writing {len(batch)} games to the move log failed: {error}"
+                    )
+
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def _write(self, data: bytes):
+        if self._file and self._file_bytes + len(data) > self.max_file_bytes:
+            self._file.close()
+            self._file = None
+
+        if not self._file:
+            # sorting the names sorts the files by age
+            name = f"games-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{self._file_count:06}.c4log"
+            self._file_count += 1
+            self._paths.append(os.path.join(self.directory, name))
+            self._file = open(self._paths[-1], "ab")
+            self._file.write(MAGIC)
+            self._file_bytes = len(MAGIC)
+            self._remove_old_files()
+
+        self._file.write(data)
+        self._file_bytes += len(data)
+
+    def _remove_old_files(self):
+        # the current file is the newest one, it is never removed
+        while len(self._paths) > max(1, self.max_files):
+            path = self._paths.pop(0)
+            try:
+                os.remove(path)
+            except OSError as error:
+                self.logger.error(f"Removing the old move log `{path}` failed: {error}")
+
+
+def log_files(directory: str) -> list[str]:
+    """The log files in `directory`, oldest first"""
+
+    return sorted(
+        os.path.join(directory, name)
+        for name in os.listdir(directory)
+        if name.endswith(".c4log")
+    )
+
+
+def read_records(paths: Iterable[str]) -> Iterator[GameRecord]:
+    """
+    Yields the records of all files one by one, so any number of games can be processed in constant memory
+
+    A record that was cut off, because the bot was killed while writing it, ends that file
+    """
+
+    size = struct.Struct("<H")
+    for path in paths:
+        with open(path, "rb") as file:
+            if file.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a move log")
+
+            while len(prefix := file.read(size.size)) == size.size:
+                length = size.unpack(prefix)[0]
+                body = file.read(length)
+                if len(body) < length:
+                    break
+                yield GameRecord.from_bytes(prefix + body)
+
+
+def export(paths: Iterable[str], output: BinaryIO):
+    """Writes the records as JSON lines"""
+
+    for record in read_records(paths):
+        output.write(orjson.dumps(attrs.asdict(record)) + b"\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the move logs as JSON lines")
+    parser.add_argument("directory", help="the folder with the .c4log files")
+    parser.add_argument("--output", help="the file to write to, stdout if not given")
+    args = parser.parse_args()
+
+    if args.output:
+        with open(args.output, "wb") as out:
+            export(log_files(args.directory), out)
+    else:
+        export(log_files(args.directory), sys.stdout.buffer)
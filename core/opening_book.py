@@ -0,0 +1,129 @@
+from typing import Literal, Optional
+
+import attrs
+
+from core.engine import (
+    Board,
+    canonical_key,
+    leftmost_move,
+    mirror_moves,
+    search_both_ends,
+    search_key,
+)
+
+
+@attrs.define
+class OpeningBook:
+    """
+    Remembers the search results of the first few plies
+
+    Every game starts from the same few positions, so those are only searched once per board size and depth.
+    Entries are stored by their canonical key, which means a position and its mirror image share one entry
+    """
+
+    plies: int = attrs.field(default=4)
+
+    # (rows, columns, to_win, depth, canonical key) -> (best moves in the canonical orientation, score)
+    _entries: dict[
+        tuple[int, int, int, int, int], tuple[Optional[int], int]
+    ] = attrs.field(init=False, factory=dict)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(
+        self, board: Board, symbol: Literal["O", "X"], depth: int
+    ) -> Optional[tuple[Optional[int], int]]:
+        """Returns the stored (best move, score) for `symbol` to move, or None if the position is unknown"""
+
+        result = self.get_both_ends(board=board, symbol=symbol, depth=depth)
+        if result is None:
+            return None
+        best_moves, score = result
+        return leftmost_move(best_moves), score
+
+    def get_both_ends(
+        self, board: Board, symbol: Literal["O", "X"], depth: int
+    ) -> Optional[tuple[int, int]]:
+        """Same as `get`, but returns the best moves as `search_both_ends` does"""
+
+        key, mirrored = search_key(board=board, symbol=symbol, depth=depth)
+        result = self._entries.get(key)
+        if result is None:
+            return None
+        best_moves, score = result
+        return mirror_moves(best_moves, columns=board.columns, mirrored=mirrored), score
+
+    def add(
+        self,
+        board: Board,
+        symbol: Literal["O", "X"],
+        depth: int,
+        result: tuple[int, int],
+    ):
+        """Stores the (best moves, score) for `symbol` to move, see `search_both_ends`"""
+
+        key, mirrored = search_key(board=board, symbol=symbol, depth=depth)
+        best_moves, score = result
+        self._entries[key] = (
+            mirror_moves(best_moves, columns=board.columns, mirrored=mirrored),
+            score,
+        )
+
+    def search_both_ends(
+        self, board: Board, symbol: Literal["O", "X"], depth: int
+    ) -> tuple[int, int]:
+        """Same as `core.engine.search_both_ends`, but looks the position up first if it is early enough in the game"""
+
+        if len(board.moves) > self.plies:
+            return search_both_ends(board=board, symbol=symbol, depth=depth)
+
+        result = self.get_both_ends(board=board, symbol=symbol, depth=depth)
+        if result is None:
+            result = search_both_ends(board=board, symbol=symbol, depth=depth)
+            self.add(board=board, symbol=symbol, depth=depth, result=result)
+        return result
+
+    def build(
+        self,
+        rows: int,
+        columns: int,
+        to_win: int,
+        depth: int,
+        symbol: Literal["O", "X"] = "O",
+    ):
+        """Searches every position of the first `plies` plies in which `symbol` is to move"""
+
+        other = "X" if symbol == "O" else "O"
+        table = {}
+        seen = set()
+
+        # either player could have started the game
+        pending = [
+            (Board(rows=rows, columns=columns, to_win=to_win), symbol),
+            (Board(rows=rows, columns=columns, to_win=to_win), other),
+        ]
+        while pending:
+            board, to_move = pending.pop()
+
+            # transpositions and mirror images only need to be expanded once
+            key, _ = canonical_key(board.pieces[to_move], board.mask, board.geometry)
+            if (key, to_move) in seen:
+                continue
+            seen.add((key, to_move))
+
+            if (
+                to_move == symbol
+                and self.get(board=board, symbol=symbol, depth=depth) is None
+            ):
+                result = search_both_ends(
+                    board=board, symbol=symbol, depth=depth, table=table
+                )
+                self.add(board=board, symbol=symbol, depth=depth, result=result)
+
+            if len(board.moves) >= self.plies or board.get_winner_symbol():
+                continue
+            for position in board.valid_moves():
+                child = board.copy()
+                child.play(symbol=to_move, position=position)
+                pending.append((child, other if to_move == symbol else symbol))
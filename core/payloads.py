@@ -0,0 +1,86 @@
+from typing import Optional
+
+import attrs
+from naff import ButtonStyles, ComponentTypes, Member, User
+
+from core.misc import EMBED_COLOUR
+
+# custom id suffix and label of the game buttons, from left to right
+BUTTONS: tuple[tuple[str, str], ...] = (
+    ("left_full", "«"),
+    ("left_one", "‹"),
+    ("submit", "🢃"),
+    ("right_one", "›"),
+    ("right_full", "»"),
+)
+
+
+def _build_rows() -> dict[tuple[bool, bool], list[dict]]:
+    """The action row of every (player one's turn, disabled) state, without the custom ids"""
+
+    rows = {}
+    for player_one_turn in (True, False):
+        for disabled in (True, False):
+            style = ButtonStyles.BLUE if player_one_turn else ButtonStyles.RED
+            rows[(player_one_turn, disabled)] = [
+                {
+                    "type": ComponentTypes.BUTTON.value,
+                    "style": style.value,
+                    "label": label,
+                    "disabled": disabled,
+                }
+                for _, label in BUTTONS
+            ]
+    return rows
+
+
+# built once, every edit only copies them
+_ROWS = _build_rows()
+
+
+@attrs.define(slots=True)
+class PayloadBuilder:
+    """
+    Builds the embed and component payloads of one game
+
+    Everything that never changes during a game (colour, author, button labels and styles) is prepared as plain
+    dicts once. naff sends dicts as they are, so an edit only merges the description and footer into the skeleton
+    and orjson serializes the result once, instead of building naff objects and converting them on every turn
+    """
+
+    author_id: int = attrs.field()
+    embed_skeleton: dict = attrs.field()
+
+    @classmethod
+    def for_author(cls, author: Member | User, title: str) -> "PayloadBuilder":
+        if isinstance(author, Member):
+            name = f"{author.display_name}'s {title}"
+            icon_url = author.display_avatar.url
+        else:
+            name = f"{author.username}#{author.discriminator}'s {title}"
+            icon_url = author.avatar.url
+
+        skeleton = {
+            "color": EMBED_COLOUR.value,
+            "author": {"name": name, "icon_url": icon_url},
+        }
+        return cls(author_id=author.id, embed_skeleton=skeleton)
+
+    def embed(self, description: str, footer: Optional[str] = None) -> dict:
+        embed = {**self.embed_skeleton, "description": description}
+        if footer:
+            embed["footer"] = {"text": footer}
+        return embed
+
+    def components(self, player_one_turn: bool, disabled: bool) -> list[dict]:
+        return [
+            {
+                "type": ComponentTypes.ACTION_ROW.value,
+                "components": [
+                    {**button, "custom_id": f"{self.author_id}|{custom_id}"}
+                    for button, (custom_id, _) in zip(
+                        _ROWS[(player_one_turn, disabled)], BUTTONS
+                    )
+                ],
+            }
+        ]
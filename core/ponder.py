@@ -0,0 +1,155 @@
+import contextlib
+import logging
+import threading
+import time
+from typing import Literal, Optional
+
+import attrs
+
+from core.engine import Board, search_both_ends
+from core.position_cache import PositionCache, SharedPositionCache
+
+
+@attrs.define
+class Ponderer:
+    """
+    Searches the computer's answers to the likely human replies while the human is still moving the cursor
+
+    All pondering happens in a single background thread, which only runs while no real search is running and then
+    only for `cpu_share` of the time. The results go into `cache`, so once the human submits, the computer's answer
+    is usually already known
+    """
+
+    cache: PositionCache | SharedPositionCache = attrs.field()
+    cpu_share: float = attrs.field(default=0.5)
+    # shallow searches are faster than looking them up, not worth pondering
+    min_depth: int = attrs.field(default=3)
+
+    logger: logging.Logger = attrs.field(
+        init=False, default=logging.getLogger("Connect4")
+    )
+
+    # game id -> [(reply column, board after the reply, symbol, depth)], in the order they should be searched
+    _pending: dict[int, list[tuple[int, Board, Literal["O", "X"], int]]] = attrs.field(
+        init=False, factory=dict
+    )
+    _active_searches: int = attrs.field(init=False, default=0)
+    _condition: threading.Condition = attrs.field(
+        init=False, factory=threading.Condition
+    )
+    _thread: Optional[threading.Thread] = attrs.field(init=False, default=None)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self):
+        """Starts the background thread. Until this is called, `ponder()` does nothing"""
+
+        if self._thread:
+            return
+        self._thread = threading.Thread(target=self._run, name="Ponderer", daemon=True)
+        self._thread.start()
+        self.logger.info(f"Pondering enabled with a CPU share of {self.cpu_share:.0%}")
+
+    def ponder(
+        self,
+        game_id: int,
+        board: Board,
+        symbol: Literal["O", "X"],
+        depth: int,
+        cursor: int,
+    ):
+        """Queues the searches for every reply of the opponent of `symbol`, starting with the column under the cursor"""
+
+        if not self.running or depth < self.min_depth:
+            return
+
+        opponent = "X" if symbol == "O" else "O"
+        jobs = []
+        for position in board.valid_moves():
+            reply = board.copy()
+            reply.play(symbol=opponent, position=position)
+
+            # the game would be over, nothing to search
+            if reply.has_won(opponent) or reply.is_full():
+                continue
+            jobs.append((position, reply, symbol, depth))
+
+        with self._condition:
+            # every reply ends the game, so there is nothing to ponder
+            if not jobs:
+                self._pending.pop(game_id, None)
+                return
+            self._pending[game_id] = self._sort(jobs, cursor=cursor)
+            self._condition.notify()
+
+    def prioritize(self, game_id: int, cursor: int):
+        """The human moved the cursor, so that reply becomes the most likely one"""
+
+        with self._condition:
+            if jobs := self._pending.get(game_id):
+                self._pending[game_id] = self._sort(jobs, cursor=cursor)
+
+    def cancel(self, game_id: int):
+        with self._condition:
+            self._pending.pop(game_id, None)
+
+    @contextlib.contextmanager
+    def searching(self):
+        """Pauses pondering while a real search is running"""
+
+        with self._condition:
+            self._active_searches += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._active_searches -= 1
+                self._condition.notify()
+
+    @staticmethod
+    def _sort(
+        jobs: list[tuple[int, Board, Literal["O", "X"], int]], cursor: int
+    ) -> list[tuple[int, Board, Literal["O", "X"], int]]:
+        return sorted(jobs, key=lambda job: abs(job[0] - cursor))
+
+    def _next_job(self) -> tuple[Board, Literal["O", "X"], int]:
+        """Waits for a job while no real search is running. Takes turns between the games"""
+
+        with self._condition:
+            while True:
+                self._condition.wait_for(
+                    lambda: self._pending and not self._active_searches
+                )
+
+                # move the game to the back of the queue
+                game_id, jobs = next(iter(self._pending.items()))
+                del self._pending[game_id]
+                if not jobs:
+                    continue
+
+                _, board, symbol, depth = jobs.pop(0)
+                if jobs:
+                    self._pending[game_id] = jobs
+                return board, symbol, depth
+
+    def _run(self):
+        while True:
+            board, symbol, depth = self._next_job()
+            if self.cache.get(board=board, symbol=symbol, depth=depth) is not None:
+                continue
+
+            start = time.perf_counter()
+            try:
+                result = search_both_ends(board=board, symbol=symbol, depth=depth)
+            except Exception as error:
+                # nothing would restart the thread, so one bad job must not end it
+                self.logger.error(f"Pondering failed: {error}")
+                continue
+            runtime = time.perf_counter() - start
+            self.cache.add(board=board, symbol=symbol, depth=depth, result=result)
+
+            # stay within the cpu budget
+            if self.cpu_share < 1:
+                time.sleep(runtime * (1 - self.cpu_share) / self.cpu_share)
@@ -0,0 +1,255 @@
+import hashlib
+import logging
+import struct
+import threading
+from collections import OrderedDict
+from multiprocessing import resource_tracker, shared_memory
+from typing import Literal, Optional
+
+import attrs
+
+from core.engine import Board, leftmost_move, mirror_moves, search_key
+
+
+@attrs.define
+class PositionCache:
+    """
+    Process wide cache of search results, shared by all games
+
+    Keys are (board size, depth, canonical position), so mirrored positions share an entry. The left most and the
+    right most best move are stored, so each orientation picks its own left most one, like `search` would. When more than
+    `max_entries` are stored, the least recently used ones are evicted. An entry takes about 250 bytes, so the
+    default limit is about 12 MB.
+    Only the deterministic search results are stored, the random mistakes of the easier difficulties are made after
+    the lookup
+    """
+
+    max_entries: int = attrs.field(default=50_000)
+
+    hits: int = attrs.field(init=False, default=0)
+    misses: int = attrs.field(init=False, default=0)
+
+    _entries: OrderedDict = attrs.field(init=False, factory=OrderedDict)
+    _lock: threading.Lock = attrs.field(init=False, factory=threading.Lock)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(
+        self, board: Board, symbol: Literal["O", "X"], depth: int
+    ) -> Optional[tuple[Optional[int], int]]:
+        """Returns the cached (best move, score) for `symbol` to move, or None if the position is unknown"""
+
+        key, mirrored = search_key(board=board, symbol=symbol, depth=depth)
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+        best_moves, score = result
+        return (
+            leftmost_move(
+                mirror_moves(best_moves, columns=board.columns, mirrored=mirrored)
+            ),
+            score,
+        )
+
+    def contains(self, board: Board, symbol: Literal["O", "X"], depth: int) -> bool:
+        """Checks if the position is cached, without counting it as a hit or miss or marking it as used"""
+
+        key, _ = search_key(board=board, symbol=symbol, depth=depth)
+        with self._lock:
+            return key in self._entries
+
+    def add(
+        self,
+        board: Board,
+        symbol: Literal["O", "X"],
+        depth: int,
+        result: tuple[int, int],
+    ):
+        """Stores the (best moves, score) for `symbol` to move, see `search_both_ends`"""
+
+        key, mirrored = search_key(board=board, symbol=symbol, depth=depth)
+        best_moves, score = result
+        result = (
+            mirror_moves(best_moves, columns=board.columns, mirrored=mirrored),
+            score,
+        )
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+# digest of the key, best moves as a bitmask of columns, score, reference bit, checksum
+_SLOT = struct.Struct("<16sHbBB")
+# the reference bit is written on its own, rewriting the whole slot could undo another process writing it
+_REFERENCE_OFFSET = _SLOT.size - 2
+
+
+@attrs.define
+class SharedPositionCache:
+    """
+    Same as `PositionCache`, but stored in shared memory so every worker process on the machine can use it
+
+    The memory is a fixed size table of sets of `ways` slots. Keys are hashed into a set and evicted with the CLOCK
+    algorithm: every hit sets the reference bit of a slot, and the clock hand clears them until it finds a slot
+    that was not used since it last came by.
+    There are no locks between the processes, instead every slot carries a checksum. A slot that was read while
+    another process was writing it fails that check and is treated as a miss
+    """
+
+    name: str = attrs.field(default="connect4-positions")
+    slots: int = attrs.field(default=1 << 20)
+    ways: int = attrs.field(default=8)
+
+    hits: int = attrs.field(init=False, default=0)
+    misses: int = attrs.field(init=False, default=0)
+    logger: logging.Logger = attrs.field(
+        init=False, default=logging.getLogger("Connect4")
+    )
+
+    _memory: shared_memory.SharedMemory = attrs.field(init=False)
+    _sets: int = attrs.field(init=False)
+    # the clock hand of every set, these only need to be roughly right so every process keeps its own
+    _hands: bytearray = attrs.field(init=False)
+
+    def __attrs_post_init__(self):
+        self._sets = self.slots // self.ways
+        self._hands = bytearray(self._sets)
+
+        size = self._sets * self.ways * _SLOT.size
+        try:
+            self._memory = shared_memory.SharedMemory(name=self.name)
+            # the first process owns the memory, the others must not delete it when they exit
+            resource_tracker.unregister(self._memory._name, "shared_memory")  # noqa
+            self.logger.info(f"Attached to the shared position cache `{self.name}`")
+        except FileNotFoundError:
+            self._memory = shared_memory.SharedMemory(
+                name=self.name, create=True, size=size
+            )
+            self.logger.info(
+                f"Created the shared position cache `{self.name}` with {self.slots} slots"
+            )
+        assert (
+            self._memory.size >= size
+        ), "The existing shared position cache is smaller than configured"
+
+    def close(self, unlink: bool = False):
+        self._memory.close()
+        if unlink:
+            self._memory.unlink()
+
+    def get(
+        self, board: Board, symbol: Literal["O", "X"], depth: int
+    ) -> Optional[tuple[Optional[int], int]]:
+        """Returns the cached (best move, score) for `symbol` to move, or None if the position is unknown"""
+
+        key, mirrored = search_key(board=board, symbol=symbol, depth=depth)
+        digest = self._digest(key)
+        buffer = self._memory.buf
+        found = self._find(buffer, digest)
+        if found is None:
+            self.misses += 1
+            return None
+
+        # mark as recently used
+        offset, moves, score, _ = found
+        buffer[offset + _REFERENCE_OFFSET] = 1
+        self.hits += 1
+        return (
+            leftmost_move(
+                mirror_moves(moves, columns=board.columns, mirrored=mirrored)
+            ),
+            score,
+        )
+
+    def contains(self, board: Board, symbol: Literal["O", "X"], depth: int) -> bool:
+        """Checks if the position is cached, without counting it as a hit or miss or marking it as used"""
+
+        key, _ = search_key(board=board, symbol=symbol, depth=depth)
+        return self._find(self._memory.buf, self._digest(key)) is not None
+
+    def _find(
+        self, buffer: memoryview, digest: bytes
+    ) -> Optional[tuple[int, int, int, int]]:
+        """Returns the offset, best moves, score and checksum of the intact slot holding `digest`"""
+
+        start = self._set_start(digest)
+        for way in range(self.ways):
+            offset = (start + way) * _SLOT.size
+            slot_digest, moves, score, _, checksum = _SLOT.unpack_from(buffer, offset)
+            if slot_digest == digest and checksum == self._checksum(
+                digest, moves, score
+            ):
+                return offset, moves, score, checksum
+        return None
+
+    def add(
+        self,
+        board: Board,
+        symbol: Literal["O", "X"],
+        depth: int,
+        result: tuple[int, int],
+    ):
+        """Stores the (best moves, score) for `symbol` to move, see `search_both_ends`"""
+
+        key, mirrored = search_key(board=board, symbol=symbol, depth=depth)
+        best_moves, score = result
+        moves = mirror_moves(best_moves, columns=board.columns, mirrored=mirrored)
+        digest = self._digest(key)
+        start = self._set_start(digest)
+        set_index = start // self.ways
+
+        buffer = self._memory.buf
+        way = self._find_victim(buffer, start, set_index, digest)
+        _SLOT.pack_into(
+            buffer,
+            (start + way) * _SLOT.size,
+            digest,
+            moves,
+            score,
+            1,
+            self._checksum(digest, moves, score),
+        )
+
+    def _find_victim(
+        self, buffer: memoryview, start: int, set_index: int, digest: bytes
+    ) -> int:
+        """Returns the way that should be overwritten: the same key, an empty slot, or the one the clock hand picks"""
+
+        for way in range(self.ways):
+            slot_digest, _, _, referenced, _ = _SLOT.unpack_from(
+                buffer, (start + way) * _SLOT.size
+            )
+            if slot_digest == digest or not any(slot_digest):
+                return way
+
+        # at most two rounds, the first one clears all reference bits
+        hand = self._hands[set_index]
+        for _ in range(2 * self.ways):
+            offset = (start + hand) * _SLOT.size
+            if not buffer[offset + _REFERENCE_OFFSET]:
+                break
+            buffer[offset + _REFERENCE_OFFSET] = 0
+            hand = (hand + 1) % self.ways
+
+        self._hands[set_index] = (hand + 1) % self.ways
+        return hand
+
+    def _set_start(self, digest: bytes) -> int:
+        return (int.from_bytes(digest[:8], "little") % self._sets) * self.ways
+
+    @staticmethod
+    def _digest(key: tuple[int, ...]) -> bytes:
+        return hashlib.blake2b(repr(key).encode(), digest_size=16).digest()
+
+    @staticmethod
+    def _checksum(digest: bytes, moves: int, score: int) -> int:
+        return (
+            digest[15] ^ (moves & 0xFF) ^ (moves >> 8) ^ ((score & 0xFF) << 1) ^ 0xA5
+        ) & 0xFF
@@ -0,0 +1,171 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from typing import Callable, TypeVar
+
+import attrs
+from anyio import to_thread
+
+T = TypeVar("T")
+
+
+@attrs.define
+class SchedulerStats:
+    """Counters of the `SearchScheduler`, logged every now and then"""
+
+    inline: int = attrs.field(default=0)
+    queued: int = attrs.field(default=0)
+    downgraded: int = attrs.field(default=0)
+    max_queue_depth: int = attrs.field(default=0)
+    total_wait: float = attrs.field(default=0)
+    max_wait: float = attrs.field(default=0)
+
+    def __str__(self) -> str:
+        average_wait = self.total_wait / self.queued if self.queued else 0
+        return (
+            f"{self.inline} inline, {self.queued} queued ({self.downgraded} downgraded) searches - "
+            f"max queue depth {self.max_queue_depth}, "
+            f"wait time avg {average_wait * 1000:.1f}ms / max {self.max_wait * 1000:.1f}ms"
+        )
+
+
+@attrs.define
+class _Job:
+    depth: int
+    search: Callable[[int], T]
+    future: asyncio.Future
+    queued_at: float = attrs.field(factory=time.perf_counter)
+
+
+@attrs.define
+class _Lane:
+    """Searches that share the same worker threads"""
+
+    workers: int
+    # guild id -> heap of (depth, order, job), in the order the guilds take turns
+    queues: dict[int, list[tuple[int, int, _Job]]] = attrs.field(factory=dict)
+    running: int = attrs.field(default=0)
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(len(queue) for queue in self.queues.values())
+
+
+@attrs.define
+class SearchScheduler:
+    """
+    Decides where and when the computer searches run
+
+    Cheap searches (shallow ones or positions that are already cached) run directly, they take well below a
+    millisecond. Everything else is queued and run in at most `workers` threads. Every guild has its own queue and
+    the guilds take turns, so a single busy guild cannot starve the others. Within a guild the shallowest search goes
+    first, a quick move should not wait for a deep one.
+    Searches that run for a time budget, like the monte carlo ones, take seconds no matter how deep. They are never
+    run directly and have their own queues and `timed_workers` threads, so the depth based ones never wait for them.
+    When more than `max_queue` searches are waiting, new ones are `overload_penalty` plies shallower
+    """
+
+    workers: int = attrs.field(default=2)
+    timed_workers: int = attrs.field(default=1)
+    inline_depth: int = attrs.field(default=3)
+    max_queue: int = attrs.field(default=32)
+    overload_penalty: int = attrs.field(default=2)
+    report_interval: float = attrs.field(default=300)
+
+    logger: logging.Logger = attrs.field(
+        init=False, default=logging.getLogger("Connect4")
+    )
+    stats: SchedulerStats = attrs.field(init=False, factory=SchedulerStats)
+
+    _lane: _Lane = attrs.field(init=False)
+    _timed_lane: _Lane = attrs.field(init=False)
+    # ties of the same depth are served in order
+    _order: itertools.count = attrs.field(init=False, factory=itertools.count)
+    _last_report: float = attrs.field(init=False, factory=time.perf_counter)
+
+    def __attrs_post_init__(self):
+        self._lane = _Lane(workers=self.workers)
+        self._timed_lane = _Lane(workers=self.timed_workers)
+
+    @property
+    def queue_depth(self) -> int:
+        return self._lane.queue_depth + self._timed_lane.queue_depth
+
+    async def run(
+        self,
+        group: int,
+        depth: int,
+        search: Callable[[int], T],
+        cheap: bool = False,
+        timed: bool = False,
+    ) -> T:
+        """
+        Runs `search(depth)`, possibly with a smaller depth if the bot is overloaded
+
+        Searches that run for a time budget instead of a depth pass `timed=True`
+        """
+
+        if not timed and (cheap or depth <= self.inline_depth):
+            self.stats.inline += 1
+            return search(depth)
+
+        # admission control
+        if self.queue_depth >= self.max_queue:
+            self.stats.downgraded += 1
+            depth = max(self.inline_depth, depth - self.overload_penalty)
+            if not timed and depth <= self.inline_depth:
+                self.stats.inline += 1
+                return search(depth)
+
+        lane = self._timed_lane if timed else self._lane
+        job = _Job(
+            depth=depth,
+            search=search,
+            future=asyncio.get_running_loop().create_future(),
+        )
+        heapq.heappush(
+            lane.queues.setdefault(group, []), (depth, next(self._order), job)
+        )
+        self.stats.queued += 1
+        self.stats.max_queue_depth = max(self.stats.max_queue_depth, self.queue_depth)
+
+        self._dispatch(lane)
+        return await job.future
+
+    def _dispatch(self, lane: _Lane):
+        """Starts the next jobs while there are free workers, taking one job per guild in turn"""
+
+        while lane.running < lane.workers and lane.queues:
+            group, queue = next(iter(lane.queues.items()))
+            _, _, job = heapq.heappop(queue)
+
+            # move the guild to the back
+            del lane.queues[group]
+            if queue:
+                lane.queues[group] = queue
+
+            lane.running += 1
+            asyncio.create_task(self._execute(lane, job))
+
+    async def _execute(self, lane: _Lane, job: _Job):
+        wait = time.perf_counter() - job.queued_at
+        self.stats.total_wait += wait
+        self.stats.max_wait = max(self.stats.max_wait, wait)
+
+        try:
+            result = await to_thread.run_sync(job.search, job.depth)
+        except Exception as error:
+            job.future.set_exception(error)
+        else:
+            job.future.set_result(result)
+        finally:
+            lane.running -= 1
+            self._dispatch(lane)
+
+        if time.perf_counter() - self._last_report > self.report_interval:
+            self._last_report = time.perf_counter()
+            self.logger.info(
+                f"Search scheduler: {self.stats} - currently {self.queue_depth} waiting"
+            )
@@ -0,0 +1,43 @@
+import time
+
+import attrs
+
+
+@attrs.define
+class StartupTimer:
+    """Measures how long each step of the startup took, from the first import until the bot is ready"""
+
+    started: float = attrs.field(factory=time.perf_counter)
+
+    # (step name, seconds)
+    steps: list[tuple[str, float]] = attrs.field(init=False, factory=list)
+    _last: float = attrs.field(init=False)
+
+    @_last.default
+    def _last_default(self) -> float:
+        return self.started
+
+    def mark(self, name: str) -> float:
+        """Ends the step `name`, which started when the previous one ended, and returns its duration"""
+
+        now = time.perf_counter()
+        duration = now - self._last
+        self._last = now
+        self.steps.append((name, duration))
+        return duration
+
+    @property
+    def total(self) -> float:
+        return self._last - self.started
+
+    def __str__(self) -> str:
+        width = max((len(name) for name, _ in self.steps), default=0)
+        lines = [
+            f"{name:<{width}} {duration * 1000:8.1f}ms" for name, duration in self.steps
+        ]
+        lines.append(f"{'total':<{width}} {self.total * 1000:8.1f}ms")
+        return "\n".join(lines)
+
+
+# created on the first import, which is the first thing main.py does
+startup_timer = StartupTimer()
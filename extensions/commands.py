@@ -1,4 +1,4 @@
-from core.base import CustomClient
+from typing import Optional
 
 from naff import (
     Button,
@@ -7,16 +7,31 @@ from naff import (
     Embed,
     Extension,
     InteractionContext,
+    Member,
     OptionTypes,
     SlashCommandChoice,
+    User,
     component_callback,
     slash_command,
     slash_option,
 )
 
+from core.analysis import parse_moves
+from core.base import CustomClient
 from core.connect_4 import Connect4, GameExists
+from core.difficulty import DIFFICULTIES
+from core.engine import VARIANTS
 from core.misc import embed_message
 
+# the board variants, shared by every command with a `board` option
+BOARD_CHOICES = [
+    SlashCommandChoice(
+        name=f"{variant.name} ({key}, {variant.to_win} in a row)",
+        value=key,
+    )
+    for key, variant in VARIANTS.items()
+]
+
 
 class CommandExtension(Extension):
     bot: CustomClient
@@ -33,17 +48,30 @@ class CommandExtension(Extension):
         opt_type=OptionTypes.INTEGER,
         required=False,
         choices=[
-            SlashCommandChoice(name="Very Easy", value=0),
-            SlashCommandChoice(name="Easy", value=1),
-            SlashCommandChoice(name="Normal", value=2),
-            SlashCommandChoice(name="Hard", value=3),
-            SlashCommandChoice(name="Very Hard", value=5),
-            SlashCommandChoice(name="Impossible", value=7),
+            SlashCommandChoice(name=difficulty.name, value=value)
+            for value, difficulty in DIFFICULTIES.items()
         ],
     )
-    async def computer(self, ctx: InteractionContext, difficulty: int = 2):
+    @slash_option(
+        name="board",
+        description="The size of the board and how many pieces in a row win. Default: `Classic`",
+        opt_type=OptionTypes.STRING,
+        required=False,
+        choices=BOARD_CHOICES,
+    )
+    async def computer(
+        self, ctx: InteractionContext, difficulty: int = 2, board: str = "6x7"
+    ):
+        variant = VARIANTS[board]
         try:
-            game = Connect4(ctx=ctx, pvp=True, pvp_difficulty=difficulty)
+            game = Connect4(
+                ctx=ctx,
+                pvp=True,
+                pvp_difficulty=difficulty,
+                rows=variant.rows,
+                columns=variant.columns,
+                to_win=variant.to_win,
+            )
         except GameExists as e:
             await ctx.send(
                 embeds=embed_message(
@@ -59,8 +87,7 @@ class CommandExtension(Extension):
                 ),
             )
         else:
-            await game.play()
-
+            await game.play(ctx)
 
     @slash_command(
         name="connect4",
@@ -68,9 +95,23 @@ class CommandExtension(Extension):
         sub_cmd_name="versus",
         sub_cmd_description="Play vs another player",
     )
-    async def versus(self, ctx: InteractionContext):
+    @slash_option(
+        name="board",
+        description="The size of the board and how many pieces in a row win. Default: `Classic`",
+        opt_type=OptionTypes.STRING,
+        required=False,
+        choices=BOARD_CHOICES,
+    )
+    async def versus(self, ctx: InteractionContext, board: str = "6x7"):
+        variant = VARIANTS[board]
         try:
-            game = Connect4(ctx=ctx, pvp=False)
+            game = Connect4(
+                ctx=ctx,
+                pvp=False,
+                rows=variant.rows,
+                columns=variant.columns,
+                to_win=variant.to_win,
+            )
         except GameExists as e:
             await ctx.send(
                 embeds=embed_message(
@@ -86,7 +127,7 @@ class CommandExtension(Extension):
                 ),
             )
         else:
-            await game.play()
+            await game.play(ctx)
 
     @slash_command(
         name="connect4",
@@ -119,8 +160,72 @@ class CommandExtension(Extension):
                     "You do not have any active game",
                     member=ctx.author,
                 ),
-                ephemeral=True
+                ephemeral=True,
+            )
+
+    @slash_command(
+        name="connect4",
+        description="Play Connect 4",
+        sub_cmd_name="analyze",
+        sub_cmd_description="See where a game was won or lost",
+    )
+    @slash_option(
+        name="moves",
+        description="The columns of the moves, counted from the left, like `4 4 3 5`. Default: your last game",
+        opt_type=OptionTypes.STRING,
+        required=False,
+    )
+    @slash_option(
+        name="board",
+        description="The board the moves were played on. Default: `Classic`",
+        opt_type=OptionTypes.STRING,
+        required=False,
+        choices=BOARD_CHOICES,
+    )
+    async def analyze(
+        self, ctx: InteractionContext, moves: Optional[str] = None, board: str = "6x7"
+    ):
+        variant = VARIANTS[board]
+        if moves is not None:
+            try:
+                moves = parse_moves(moves, columns=variant.columns)
+            except ValueError as error:
+                await ctx.send(
+                    embeds=embed_message(
+                        "Connect 4 Analysis", str(error), member=ctx.author
+                    ),
+                    ephemeral=True,
+                )
+                return
+
+        await Connect4.analyze(ctx=ctx, variant=variant, moves=moves)
+
+    @slash_command(
+        name="connect4",
+        description="Play Connect 4",
+        sub_cmd_name="spectate",
+        sub_cmd_description="Watch the game of another player",
+    )
+    @slash_option(
+        name="player",
+        description="The player who started the game",
+        opt_type=OptionTypes.USER,
+        required=True,
+    )
+    async def spectate(self, ctx: InteractionContext, player: Member | User):
+        game = Connect4.get_existing(author_id=player.id)
+        if not game:
+            await ctx.send(
+                embeds=embed_message(
+                    "Connect 4 Game",
+                    f"{player.mention} does not have a game in progress",
+                    member=ctx.author,
+                ),
+                ephemeral=True,
             )
+        else:
+            await game.spectate(ctx)
+
 
 def setup(bot: CustomClient):
     """Let naff load the extension"""
@@ -1,9 +1,7 @@
+from naff import Extension, listen
 from naff.api.events import Component
 
 from core.base import CustomClient
-
-from naff import listen, Extension
-
 from core.connect_4 import Connect4
 from core.misc import embed_message
 
@@ -21,7 +19,7 @@ class EventExtension(Extension):
                 embeds=embed_message(
                     "Connect 4 Game",
                     f"My power went out so I lost all info about this game\nSorry, gotta restart by using `/connect4`",
-                    member=event.context.author
+                    member=event.context.author,
                 ),
                 ephemeral=True,
             )
@@ -30,8 +28,6 @@ class EventExtension(Extension):
                 await game.move_cursor(ctx=event.context, move=move)
 
 
-
-
 def setup(bot: CustomClient):
     """Let naff load the extension"""
 
@@ -1,14 +1,18 @@
+# first, so the startup timings include the time it takes to import naff and everything else
+from core.startup import startup_timer  # isort: skip
+
 import logging
 import os
 
 from dotenv import load_dotenv
 from naff import Intents
-from naff.ext.debug_extension import DebugExtension
 
-from core.init_logging import init_logging
 from core.base import CustomClient
+from core.connect_4 import Connect4
 from core.extensions_loader import load_extensions
+from core.init_logging import init_logging
 
+startup_timer.mark("imports")
 
 
 if __name__ == "__main__":
@@ -17,6 +21,7 @@ if __name__ == "__main__":
 
     # initialise logging
     init_logging()
+    startup_timer.mark("environment and logging")
 
     # create our bot instance
     bot = CustomClient(
@@ -24,15 +29,38 @@ if __name__ == "__main__":
         auto_defer=True,  # automatically deferring interactions
         activity="Connecting everything in 4s",  # the status message of the bot
         logger=logging.getLogger("NAFF"),
-
     )
 
     # load the debug extension if that is wanted
     if os.getenv("LOAD_DEBUG_COMMANDS") == "true":
+        # rarely used, so only imported when needed
+        from naff.ext.debug_extension import DebugExtension
+
         DebugExtension(bot=bot)
 
+    # share the search results with the other bot processes on this machine if that is wanted
+    if cache_name := os.getenv("SHARED_CACHE_NAME"):
+        Connect4.use_shared_cache(
+            name=cache_name, slots=int(os.getenv("SHARED_CACHE_SLOTS", 1 << 20))
+        )
+
+    # let the computer think ahead during the players turn if that is wanted
+    if os.getenv("ENABLE_PONDERING") == "true":
+        Connect4.enable_pondering(cpu_share=float(os.getenv("PONDER_CPU_SHARE", "0.5")))
+
+    # record every finished game, unless turned off with an empty folder name
+    if move_log_dir := os.getenv("MOVE_LOG_DIR", "./logs/games"):
+        Connect4.enable_move_log(directory=move_log_dir)
+
+    startup_timer.mark("client")
+
     # load all extensions in the ./extensions folder
     load_extensions(bot=bot)
+    startup_timer.mark("extensions")
+
+    # build the engine tables and the opening book now, and not during the first games
+    Connect4.warm_up(book_depth=int(os.getenv("WARM_UP_BOOK_DEPTH", "5")))
+    startup_timer.mark("warm-up")
 
     # start the bot
     bot.start(os.getenv("DISCORD_TOKEN"))
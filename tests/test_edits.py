@@ -0,0 +1,170 @@
+import asyncio
+import unittest
+
+from naff.client.errors import NotFound
+
+from core.edits import EditPriority, EditScheduler, MessageRef
+
+
+class FakeHTTP:
+    """Records the edits instead of sending them"""
+
+    def __init__(self):
+        self.edits = []
+        self.deleted = set()
+
+    async def edit_message(self, payload: dict, channel_id: int, message_id: int):
+        await asyncio.sleep(0)
+        if message_id in self.deleted:
+            raise NotFound(
+                FakeResponse(),
+                response_data={"message": "Unknown Message", "code": 10008},
+            )
+        self.edits.append((message_id, payload))
+
+
+class FakeResponse:
+    status = 404
+    reason = "Not Found"
+
+
+class FakeClient:
+    def __init__(self):
+        self.http = FakeHTTP()
+
+
+class FakeContext:
+    """A component interaction, `fail` makes answering it raise like an expired one"""
+
+    def __init__(self, fail: bool = False):
+        self.responded = False
+        self.fail = fail
+        self.responses = []
+
+    async def edit_origin(self, **payload):
+        await asyncio.sleep(0)
+        if self.fail:
+            raise RuntimeError("Unknown interaction")
+        self.responded = True
+        self.responses.append(payload)
+
+
+class EditSchedulerTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.client = FakeClient()
+        # one edit every 0.1 seconds
+        self.scheduler = EditScheduler(edits_per_period=1, period=0.1)
+
+    def message(self, message_id: int, channel_id: int = 1) -> MessageRef:
+        return MessageRef(client=self.client, channel_id=channel_id, id=message_id)
+
+    async def test_newer_edits_replace_queued_ones(self):
+        await self.scheduler.submit(
+            self.message(1), EditPriority.CURSOR, embeds={"n": 0}
+        )
+        await asyncio.sleep(0.01)
+
+        first = await self.scheduler.submit(
+            self.message(1), EditPriority.CURSOR, embeds={"n": 1}
+        )
+        second = await self.scheduler.submit(
+            self.message(1), EditPriority.SUBMIT, components=[]
+        )
+        self.assertTrue(await asyncio.wait_for(second, 1))
+        self.assertTrue(first.result())
+
+        self.assertEqual(
+            self.client.http.edits,
+            [
+                (1, {"embeds": [{"n": 0}]}),
+                (1, {"embeds": [{"n": 1}], "components": []}),
+            ],
+        )
+
+    async def test_game_overs_go_first(self):
+        await self.scheduler.submit(self.message(1), EditPriority.CURSOR, embeds={})
+        await asyncio.sleep(0.01)
+
+        await self.scheduler.submit(self.message(2), EditPriority.CURSOR, embeds={})
+        await self.scheduler.submit(self.message(3), EditPriority.SUBMIT, embeds={})
+        last = await self.scheduler.submit(
+            self.message(4), EditPriority.GAME_OVER, embeds={}
+        )
+        await asyncio.wait_for(last, 1)
+        await asyncio.sleep(0.25)
+
+        self.assertEqual(
+            [message_id for message_id, _ in self.client.http.edits], [1, 4, 3, 2]
+        )
+
+    async def test_response_while_waiting_for_a_token(self):
+        await self.scheduler.submit(
+            self.message(1), EditPriority.CURSOR, embeds={"n": 0}
+        )
+        await asyncio.sleep(0.01)
+
+        # the worker is waiting for a token when the click takes its only queued edit
+        queued = await self.scheduler.submit(
+            self.message(1), EditPriority.SUBMIT, embeds={"n": 1}, components=[]
+        )
+        await asyncio.sleep(0.01)
+        ctx = FakeContext()
+        await self.scheduler.respond(
+            ctx, self.message(1), EditPriority.CURSOR, embeds={"n": 2}
+        )
+        self.assertTrue(await asyncio.wait_for(queued, 1))
+        self.assertEqual(ctx.responses, [{"embeds": {"n": 2}, "components": []}])
+
+        # and the channel keeps working after that
+        await asyncio.sleep(0.15)
+        game_over = await self.scheduler.submit(
+            self.message(1), EditPriority.GAME_OVER, embeds={"n": 3}
+        )
+        self.assertTrue(await asyncio.wait_for(game_over, 1))
+        self.assertEqual(self.client.http.edits[-1], (1, {"embeds": [{"n": 3}]}))
+
+    async def test_failed_response_is_queued(self):
+        await self.scheduler.submit(
+            self.message(1), EditPriority.CURSOR, embeds={"n": 0}
+        )
+        await asyncio.sleep(0.01)
+
+        queued = await self.scheduler.submit(
+            self.message(1), EditPriority.SUBMIT, embeds={"n": 1}, components=[]
+        )
+        await self.scheduler.respond(
+            FakeContext(fail=True),
+            self.message(1),
+            EditPriority.CURSOR,
+            embeds={"n": 2},
+        )
+
+        self.assertTrue(await asyncio.wait_for(queued, 1))
+        self.assertEqual(
+            self.client.http.edits[-1], (1, {"embeds": [{"n": 2}], "components": []})
+        )
+
+    async def test_answered_interactions_are_queued(self):
+        ctx = FakeContext()
+        ctx.responded = True
+        await self.scheduler.respond(
+            ctx, self.message(1), EditPriority.CURSOR, embeds={"n": 0}
+        )
+        await asyncio.sleep(0.01)
+
+        self.assertEqual(ctx.responses, [])
+        self.assertEqual(self.client.http.edits, [(1, {"embeds": [{"n": 0}]})])
+
+    async def test_deleted_messages(self):
+        self.client.http.deleted.add(1)
+        gone = []
+        future = await self.scheduler.submit(
+            self.message(1), EditPriority.CURSOR, on_not_found=gone.append, embeds={}
+        )
+
+        self.assertFalse(await asyncio.wait_for(future, 1))
+        self.assertEqual(gone, [self.message(1)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+import io
+import os
+import tempfile
+import unittest
+
+import orjson
+
+from core.move_log import MAGIC, GameRecord, MoveLog, export, log_files, read_records
+
+
+def game(player_one: int = 1, moves: int = 7) -> GameRecord:
+    return GameRecord(
+        finished_at=1_650_000_000.5,
+        rows=6,
+        columns=7,
+        to_win=4,
+        difficulty=5,
+        player_one=player_one,
+        player_two=None,
+        first="X",
+        outcome="X",
+        moves=[i % 7 for i in range(moves)],
+        ai_latencies=[0.125, 0.25, 0.5],
+    )
+
+
+class GameRecordTest(unittest.TestCase):
+    def test_round_trip(self):
+        for record in (
+            game(),
+            game(moves=0),
+            GameRecord(
+                finished_at=1.0,
+                rows=10,
+                columns=12,
+                to_win=5,
+                difficulty=None,
+                player_one=2**63,
+                player_two=3,
+                first="O",
+                outcome="abandoned",
+                moves=[11, 0, 10],
+            ),
+        ):
+            self.assertEqual(GameRecord.from_bytes(record.to_bytes()), record)
+
+    def test_size_prefix(self):
+        data = game().to_bytes()
+        self.assertEqual(int.from_bytes(data[:2], "little"), len(data) - 2)
+
+    def test_moves_share_bytes(self):
+        self.assertEqual(
+            len(game(moves=9).to_bytes()) - len(game(moves=0).to_bytes()), 5
+        )
+
+    def test_long_latencies_are_capped(self):
+        record = game()
+        record.ai_latencies = [100.0]
+        self.assertEqual(
+            GameRecord.from_bytes(record.to_bytes()).ai_latencies, [65.535]
+        )
+
+
+class MoveLogTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, records: list[GameRecord], **kwargs) -> MoveLog:
+        move_log = MoveLog(directory=self.directory.name, flush_interval=0.01, **kwargs)
+        move_log.start()
+        for record in records:
+            move_log.record(record)
+        move_log.close()
+        return move_log
+
+    def test_records_are_read_back(self):
+        records = [game(player_one=i) for i in range(10)]
+        self.write(records)
+        self.assertEqual(list(read_records(log_files(self.directory.name))), records)
+
+    def test_files_stay_below_the_limit(self):
+        size = len(game().to_bytes())
+        self.write(
+            [game(player_one=i) for i in range(20)],
+            max_file_bytes=len(MAGIC) + 3 * size,
+            max_files=100,
+        )
+
+        paths = log_files(self.directory.name)
+        self.assertEqual(len(paths), 7)
+        for path in paths:
+            self.assertLessEqual(os.path.getsize(path), len(MAGIC) + 3 * size)
+        self.assertEqual(len(list(read_records(paths))), 20)
+
+    def test_only_own_old_files_are_removed(self):
+        other = os.path.join(
+            self.directory.name, "games-00000000-000000-1-000000.c4log"
+        )
+        with open(other, "wb") as file:
+            file.write(MAGIC)
+
+        size = len(game().to_bytes())
+        self.write(
+            [game(player_one=i) for i in range(20)],
+            max_file_bytes=len(MAGIC) + 3 * size,
+            max_files=2,
+        )
+
+        paths = log_files(self.directory.name)
+        self.assertEqual(len(paths), 3)
+        self.assertIn(other, paths)
+        # the newest games are kept
+        self.assertEqual(
+            [record.player_one for record in read_records(paths)], [15, 16, 17, 18, 19]
+        )
+
+    def test_cut_off_record_ends_the_file(self):
+        path = os.path.join(self.directory.name, "games.c4log")
+        with open(path, "wb") as file:
+            file.write(
+                MAGIC
+                + game(player_one=1).to_bytes()
+                + game(player_one=2).to_bytes()[:-3]
+            )
+
+        self.assertEqual([record.player_one for record in read_records([path])], [1])
+
+    def test_other_files_are_rejected(self):
+        path = os.path.join(self.directory.name, "games.c4log")
+        with open(path, "wb") as file:
+            file.write(b"not a log")
+
+        with self.assertRaises(ValueError):
+            list(read_records([path]))
+
+    def test_export(self):
+        self.write([game()])
+        output = io.BytesIO()
+        export(log_files(self.directory.name), output)
+
+        lines = output.getvalue().splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(orjson.loads(lines[0])["moves"], game().moves)
+
+
+if __name__ == "__main__":
+    unittest.main()
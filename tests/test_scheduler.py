@@ -0,0 +1,73 @@
+import asyncio
+import threading
+import unittest
+
+from core.scheduler import SearchScheduler
+
+
+class SearchSchedulerTest(unittest.IsolatedAsyncioTestCase):
+    async def test_shallow_searches_run_inline(self):
+        scheduler = SearchScheduler()
+        thread = await scheduler.run(
+            group=1, depth=3, search=lambda depth: threading.current_thread()
+        )
+
+        self.assertIs(thread, threading.current_thread())
+        self.assertEqual(scheduler.stats.inline, 1)
+
+    async def test_timed_searches_never_run_inline(self):
+        scheduler = SearchScheduler()
+        thread = await scheduler.run(
+            group=1,
+            depth=1,
+            search=lambda depth: threading.current_thread(),
+            timed=True,
+        )
+
+        self.assertIsNot(thread, threading.current_thread())
+        self.assertEqual(scheduler.stats.inline, 0)
+
+    async def test_timed_searches_do_not_block_the_others(self):
+        scheduler = SearchScheduler(workers=1, timed_workers=1)
+        release = threading.Event()
+
+        timed = asyncio.create_task(
+            scheduler.run(
+                group=1, depth=7, search=lambda depth: release.wait(5), timed=True
+            )
+        )
+        await asyncio.sleep(0.01)
+        result = await asyncio.wait_for(
+            scheduler.run(group=1, depth=7, search=lambda depth: depth), 1
+        )
+
+        self.assertEqual(result, 7)
+        release.set()
+        await timed
+
+    async def test_shallowest_search_of_a_guild_goes_first(self):
+        scheduler = SearchScheduler(workers=1)
+        release = threading.Event()
+        order = []
+
+        def search(depth: int) -> int:
+            order.append(depth)
+            return depth
+
+        blocking = asyncio.create_task(
+            scheduler.run(group=1, depth=9, search=lambda depth: release.wait(5))
+        )
+        await asyncio.sleep(0.01)
+        waiting = [
+            asyncio.create_task(scheduler.run(group=1, depth=depth, search=search))
+            for depth in (7, 5, 7, 4)
+        ]
+        await asyncio.sleep(0.01)
+        release.set()
+        await asyncio.gather(blocking, *waiting)
+
+        self.assertEqual(order, [4, 5, 7, 7])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+
+from core.engine import Board, search, search_both_ends
+from core.opening_book import OpeningBook
+from core.position_cache import PositionCache
+
+
+def positions(board: Board, plies: int):
+    """Every position after `plies` more moves"""
+
+    if plies == 0:
+        yield board
+        return
+    symbol = "XO"[len(board.moves) % 2]
+    for position in board.valid_moves():
+        child = board.copy()
+        child.play(symbol=symbol, position=position)
+        yield from positions(child, plies - 1)
+
+
+class StoredResultsTest(unittest.TestCase):
+    """Results are stored by canonical key, looking one up has to give the move `search` picks for the board"""
+
+    def test_opening_book(self):
+        book = OpeningBook(plies=3)
+        book.build(rows=6, columns=7, to_win=4, depth=3)
+
+        for board in positions(Board(rows=6, columns=7, to_win=4), 3):
+            self.assertEqual(
+                book.get(board=board, symbol="O", depth=3),
+                search(board=board, symbol="O", depth=3),
+            )
+
+    def test_position_cache_mirrored(self):
+        for board in positions(Board(rows=6, columns=7, to_win=4), 2):
+            mirrored = Board(rows=6, columns=7, to_win=4)
+            for i, position in enumerate(board.moves):
+                mirrored.play(symbol="XO"[i % 2], position=6 - position)
+
+            cache = PositionCache()
+            cache.add(
+                board=board,
+                symbol="X",
+                depth=4,
+                result=search_both_ends(board=board, symbol="X", depth=4),
+            )
+            self.assertEqual(
+                cache.get(board=mirrored, symbol="X", depth=4),
+                search(board=mirrored, symbol="X", depth=4),
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()